@@ -0,0 +1,74 @@
+import time
+
+from joonbot.arguments import Text, choice, compile_parser, tokenize
+
+MESSAGES = [
+    'mc <http://mc.example.com|mc.example.com> ping',
+    'covid19 "South Korea"',
+    'covid19 3',
+    'dust 종로구',
+    'mc play.example.net:25565 query',
+]
+
+MC_METHOD = choice('status', 'ping', 'query')
+
+
+async def minecraft(_, address=None, method: MC_METHOD = 'status', *, bot, **__):
+    pass
+
+
+async def covid19(_, target: (int, Text) = None, *, bot, **__):
+    pass
+
+
+async def air_pollution(_, station=None, *, bot, **__):
+    pass
+
+
+COMMANDS = {'mc': minecraft, 'covid19': covid19, 'dust': air_pollution}
+
+
+def reflective(func, tokens):
+    # Inspecting the signature on every call, for comparison.
+    return compile_parser(func)(tokens)
+
+
+def main(count=100000):
+    parsers = {alias: compile_parser(func) for alias, func in COMMANDS.items()}
+    messages = (MESSAGES * (count // len(MESSAGES) + 1))[:count]
+
+    start = time.perf_counter()
+    for text in messages:
+        text.split()
+    split_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in messages:
+        tokenize(text)
+    tokenize_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in messages:
+        tokens = tokenize(text)
+        parsers[tokens[0]](tokens)
+    compiled_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in messages:
+        tokens = tokenize(text)
+        reflective(COMMANDS[tokens[0]], tokens)
+    reflective_elapsed = time.perf_counter() - start
+
+    for name, elapsed in (
+        ('str.split', split_elapsed),
+        ('tokenize', tokenize_elapsed),
+        ('tokenize + compiled parse', compiled_elapsed),
+        ('tokenize + signature per call', reflective_elapsed),
+    ):
+        print('{:>30}: {:>10.0f} messages/sec, {:>6.2f} us/message'.format(
+            name, count / elapsed, elapsed / count * 1e6,
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import asyncio
+import resource
+import subprocess
+import sys
+
+import discord
+
+from joonbot.core import DiscordBot
+
+
+def rss_mib():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+
+
+def build_guild(guild_id, num_members):
+    return {
+        'id': str(guild_id),
+        'name': 'bench',
+        'owner_id': '1',
+        'member_count': num_members,
+        'large': num_members > 250,
+        'roles': [{'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0}],
+        'emojis': [],
+        'channels': [{'id': str(guild_id + 1), 'type': 0, 'name': 'general', 'position': 0}],
+        'members': [
+            {
+                'user': {'id': str(10 ** 6 + i), 'username': 'user{}'.format(i), 'discriminator': '0001', 'avatar': None},
+                'roles': [],
+                'joined_at': '2020-04-01T00:00:00+00:00',
+                'deaf': False,
+                'mute': False,
+            }
+            for i in range(num_members)
+        ],
+        'presences': [
+            {'user': {'id': str(10 ** 6 + i)}, 'status': 'online', 'activities': [], 'client_status': {}}
+            for i in range(num_members // 10)
+        ],
+        'voice_states': [],
+    }
+
+
+def build_message(guild_id, i, num_members):
+    author = {'id': str(10 ** 6 + i % num_members), 'username': 'user', 'discriminator': '0001', 'avatar': None}
+    return {
+        'id': str(10 ** 7 + i),
+        'channel_id': str(guild_id + 1),
+        'guild_id': str(guild_id),
+        'author': author,
+        'member': {'roles': [], 'joined_at': '2020-04-01T00:00:00+00:00', 'deaf': False, 'mute': False},
+        'content': 'hello world {}'.format(i),
+        'timestamp': '2020-04-01T00:00:00+00:00',
+        'edited_timestamp': None,
+        'tts': False,
+        'mention_everyone': False,
+        'mentions': [],
+        'mention_roles': [],
+        'attachments': [],
+        'embeds': [],
+        'pinned': False,
+        'type': 0,
+    }
+
+
+def measure(profile, num_members, num_messages=5000):
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    if profile == 'lean':
+        options = DiscordBot.client_options()
+    else:
+        # Everything the gateway can send, cached with discord.py's defaults. Releases before
+        # 1.5 have no intents and always receive everything.
+        intents = discord.Intents.all() if hasattr(discord, 'Intents') else None
+        options = DiscordBot.client_options(lean=False, intents=intents)
+    baseline = rss_mib()
+    client = discord.Client(**options)
+    state = client._connection
+    guild_id = 10 ** 5
+    state._add_guild_from_data(build_guild(guild_id, num_members))
+    for i in range(num_messages):
+        state.parse_message_create(build_message(guild_id, i, num_members))
+    guild = state._get_guild(guild_id)
+    print('{:>5} / {:>6} members: {:>+6.1f} MiB RSS, {:>6} members cached, {:>5} messages cached'.format(
+        profile, num_members, rss_mib() - baseline, len(guild._members), len(state._messages or ()),
+    ))
+
+
+def main():
+    # Each measurement runs in a fresh interpreter so freed arenas of one profile do not hide the next.
+    for num_members in (1000, 10000):
+        for profile in ('full', 'lean'):
+            subprocess.run([sys.executable, '-m', 'benchmarks.discord_memory', profile, str(num_members)], check=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        measure(sys.argv[1], int(sys.argv[2]))
+    else:
+        main()
@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import time
+
+SIGNING_SECRET = 'benchmark-signing-secret'
+os.environ.setdefault('SLACK_SIGNING_SECRET', SIGNING_SECRET)
+
+from joonbot.app import SlackEventHandler  # noqa: E402
+
+
+class FakeRequest:
+    can_read_body = True
+
+    def __init__(self, headers, body):
+        self.headers = headers
+        self._body = body
+
+    async def read(self):
+        return self._body
+
+    async def text(self):
+        return self._body.decode()
+
+    async def json(self):
+        return json.loads(await self.text())
+
+
+class LegacySlackEventHandler(SlackEventHandler):
+    async def read_event(self, request):
+        timestamp = request.headers.get('X-Slack-Request-Timestamp', '')
+        slack_signature = request.headers.get('X-Slack-Signature', '')
+        request_body = await request.text()
+        sig_basestring = 'v0:{}:{}'.format(timestamp, request_body)
+        signature = 'v0={}'.format(hmac.new(self._slack_signing_secret.encode(),
+                                   sig_basestring.encode(),
+                                   hashlib.sha256).hexdigest())
+        if not hmac.compare_digest(signature, slack_signature):
+            return None
+        return await request.json()
+
+
+def signed_request(secret, body, timestamp=None):
+    timestamp = str(int(time.time()) if timestamp is None else timestamp)
+    basestring = b'v0:' + timestamp.encode() + b':' + body
+    signature = 'v0=' + hmac.new(secret.encode(), basestring, hashlib.sha256).hexdigest()
+    return FakeRequest({
+        'X-Slack-Request-Timestamp': timestamp,
+        'X-Slack-Signature': signature,
+    }, body)
+
+
+def build_requests(count):
+    requests = []
+    for i in range(count):
+        body = json.dumps({
+            'token': 'token',
+            'team_id': 'T00000000',
+            'type': 'event_callback',
+            'event_id': 'Ev{:08d}'.format(i),
+            'event_time': int(time.time()),
+            'event': {
+                'type': 'message',
+                'channel': 'C00000000',
+                'user': 'U00000000',
+                'text': '안녕하세요 just some ordinary chatter number {}'.format(i) * 4,
+                'ts': '{}.000100'.format(int(time.time())),
+            },
+        }, ensure_ascii=False).encode()
+        requests.append(signed_request(SIGNING_SECRET, body))
+    return requests
+
+
+async def run(handler, requests):
+    for request in requests:
+        await handler.handle_event(request)
+
+
+def main(count=50000):
+    loop = asyncio.new_event_loop()
+    for name, handler_cls in (('before', LegacySlackEventHandler), ('after', SlackEventHandler)):
+        handler = handler_cls(slack_signing_secret=SIGNING_SECRET)
+        requests = build_requests(count)
+        start = time.perf_counter()
+        loop.run_until_complete(run(handler, requests))
+        elapsed = time.perf_counter() - start
+        print('{:>6}: {:>10.0f} requests/sec'.format(name, count / elapsed))
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
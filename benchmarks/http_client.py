@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+import aiohttp
+from aiohttp import web
+
+from joonbot.http import HttpClient
+
+
+async def stub(_):
+    return web.json_response({'list': [{'dataTime': '2020-04-01 12:00', 'pm10Value': '30'}]})
+
+
+async def start_stub_server():
+    stub_app = web.Application()
+    stub_app.add_routes([web.get('/', stub)])
+    runner = web.AppRunner(stub_app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, 'http://127.0.0.1:{}/'.format(port)
+
+
+async def session_per_request(url, count, concurrency):
+    async def fetch():
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url) as resp:
+                return await resp.json(content_type=None)
+    await run_concurrently(fetch, count, concurrency)
+
+
+async def pooled(url, count, concurrency):
+    http = HttpClient()
+    await run_concurrently(lambda: http.get_json(url), count, concurrency)
+    await http.close()
+
+
+async def run_concurrently(fetch, count, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded():
+        async with semaphore:
+            await fetch()
+    await asyncio.gather(*[bounded() for _ in range(count)])
+
+
+async def main(count=2000, concurrency=10):
+    runner, url = await start_stub_server()
+    for name, bench in (('session per request', session_per_request), ('pooled HttpClient', pooled)):
+        start = time.perf_counter()
+        await bench(url, count, concurrency)
+        elapsed = time.perf_counter() - start
+        print('{:>20}: {:>8.0f} requests/sec'.format(name, count / elapsed))
+    await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(main())
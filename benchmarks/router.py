@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+from joonbot.core import ChatBot
+
+
+class NullBot(ChatBot):
+    async def send_message(self, channel, text, **_):
+        pass
+
+
+async def noop(*_, **__):
+    pass
+
+
+def build_bot(size):
+    bot = NullBot(
+        name='bench',
+        triggers=['trigger{} '.format(i) for i in range(size)],
+    )
+    for i in range(size):
+        bot.add_command(noop, aliases=['alias{}'.format(i)], group=['user{}'.format(j) for j in range(size)])
+    return bot
+
+
+def build_messages(size, count):
+    messages = []
+    for i in range(count):
+        if i % 20 == 0:
+            messages.append('trigger{} alias{} some arguments'.format(i % size, (i * 7) % size))
+        else:
+            messages.append('just some ordinary chatter number {} in a busy channel'.format(i))
+    return messages
+
+
+async def run(bot, messages):
+    for text in messages:
+        await bot.handle_message('channel', 'user0', text)
+
+
+def main(count=100000):
+    loop = asyncio.new_event_loop()
+    for size in (10, 100, 1000):
+        bot = build_bot(size)
+        messages = build_messages(size, count)
+        loop.run_until_complete(run(bot, messages[:100]))
+        start = time.perf_counter()
+        loop.run_until_complete(run(bot, messages))
+        elapsed = time.perf_counter() - start
+        print('{:>5} aliases/triggers: {:>10.0f} messages/sec'.format(size, count / elapsed))
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+import asyncio
+import time
+
+from joonbot.core import ChatBot
+
+from .router import NullBot, build_messages, noop, run
+
+
+def build_bot(num_handlers, signal):
+    bot = NullBot(name='bench', triggers=['bench '])
+    bot.add_command(noop, aliases=['alias0'])
+    for i in range(num_handlers):
+        bot.register_signal_handler(signal, noop, priority=i % 3)
+    return bot
+
+
+def main(count=100000):
+    loop = asyncio.new_event_loop()
+    messages = build_messages(1, count)
+    messages = [message.replace('trigger0 ', 'bench ') for message in messages]
+    for signal in (ChatBot.PRE_MESSAGE_SIGNAL, ChatBot.TRIGGERED_SIGNAL):
+        for num_handlers in (0, 5, 20):
+            bot = build_bot(num_handlers, signal)
+            start = time.perf_counter()
+            loop.run_until_complete(run(bot, messages))
+            elapsed = time.perf_counter() - start
+            print('{:>11} / {:>2} handlers: {:>6.2f} us/message'.format(
+                signal, num_handlers, elapsed / count * 1e6,
+            ))
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
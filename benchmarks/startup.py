@@ -0,0 +1,49 @@
+import statistics
+import subprocess
+import sys
+
+# Each sample runs in a fresh interpreter; stdout is "<milliseconds> <heavy modules loaded>".
+IMPORT_SNIPPET = '''
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [name for name in ('discord', 'slack', 'mcstatus') if name in sys.modules]
+print(elapsed * 1e3, ','.join(heavy) or '-')
+'''
+
+STARTUP_SNIPPET = '''
+import os, sys, time
+os.environ.setdefault('SLACK_SIGNING_SECRET', 'benchmark')
+start = time.perf_counter()
+from joonbot.app import create_app
+create_app(discord=False, scheduler=False)
+elapsed = time.perf_counter() - start
+heavy = [name for name in ('discord', 'slack', 'mcstatus') if name in sys.modules]
+print(elapsed * 1e3, ','.join(heavy) or '-')
+'''
+
+
+def sample(snippet, runs):
+    timings = []
+    heavy = '-'
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-W', 'ignore', '-c', snippet], check=True, stdout=subprocess.PIPE,
+        ).stdout.decode().split()
+        timings.append(float(output[0]))
+        heavy = output[1]
+    return statistics.median(timings), heavy
+
+
+def main(runs=7):
+    cases = [('import ' + module, IMPORT_SNIPPET.format(module=module))
+             for module in ('joonbot.core', 'joonbot.bot', 'joonbot.app')]
+    cases.append(('create_app()', STARTUP_SNIPPET))
+    for name, snippet in cases:
+        elapsed, heavy = sample(snippet, runs)
+        print('{:>20}: {:>7.1f} ms (median of {}), SDKs loaded: {}'.format(name, elapsed, runs, heavy))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import asyncio
+import time
+import tracemalloc
+
+from joonbot.core import SlackBot
+from joonbot.tenants import SlackTenants, StaticTokenStore
+
+from .router import noop
+
+
+def build_bot(num_commands=50):
+    bot = SlackBot(token='xoxb-home', name='bench', triggers=['bench '])
+    for i in range(num_commands):
+        bot.add_command(noop, aliases=['alias{}'.format(i), 'a{}'.format(i)])
+    return bot
+
+
+def cloned(bot, team_ids):
+    bots = [SlackBot.clone(bot, token='xoxb-{}'.format(team_id)) for team_id in team_ids]
+    for cloned_bot in bots:
+        # Built on the first message anyway.
+        cloned_bot.router
+        cloned_bot.help_index
+    return bots
+
+
+def shared(bot, team_ids):
+    tenants = SlackTenants(bot, StaticTokenStore({team_id: 'xoxb-{}'.format(team_id) for team_id in team_ids}))
+    loop = asyncio.get_event_loop()
+    for team_id in team_ids:
+        loop.run_until_complete(tenants.get(team_id))
+    return tenants
+
+
+def main():
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    for num_teams in (1, 100, 1000):
+        team_ids = ['T{}'.format(i) for i in range(num_teams)]
+        for name, build in (('clone', cloned), ('shared', shared)):
+            bot = build_bot()
+            bot.router
+            tracemalloc.start()
+            start = time.perf_counter()
+            instances = build(bot, team_ids)
+            elapsed = time.perf_counter() - start
+            size, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print('{:>6} / {:>4} teams: {:>8.2f} ms, {:>8.1f} KiB, {:>5.2f} KiB/team'.format(
+                name, num_teams, elapsed * 1e3, size / 1024, size / 1024 / num_teams,
+            ))
+            del instances
+
+
+if __name__ == '__main__':
+    main()
@@ -1,53 +1,186 @@
 import asyncio
 import hashlib
 import hmac
+import json
+import logging
 import os
+import tempfile
+import time
 
-import slack
 from aiohttp import web
 
-from .bot import joonbot
+from . import metrics
+from .bot import (
+    air_pollution_subscriptions, covid19_dataset, fetch_air_pollution, joonbot, minecraft_client, slack_tenants,
+)
 from .core import DiscordBot
+from .events import EventDeduplicator, EventDispatcher, SqliteEventDeduplicator
+from .http import HttpClient
+from .logs import LogPipeline
+from .plugin import PluginWatcher
+from .socketmode import SocketModeReceiver
+
+try:
+    import orjson
+    default_json_loads = orjson.loads
+except ImportError:
+    default_json_loads = json.loads
 
 
 class SlackEventHandler:
-    def __init__(self, slack_signing_secret=None):
+    def __init__(self, slack_signing_secret=None, dedup_window=600, dedup_size=10000, dispatcher=None,
+                 replay_window=300, json_loads=None, clock=time.time, logger=None):
         self._slack_signing_secret = slack_signing_secret or os.getenv('SLACK_SIGNING_SECRET')
-        if not self._slack_signing_secret:
-            raise ValueError('Slack signing secret not found.')
+        self._signing_hmac = None
+        if self._slack_signing_secret:
+            self._signing_hmac = hmac.new(self._slack_signing_secret.encode(), b'v0:', hashlib.sha256)
+        self._replay_window = replay_window
+        self._json_loads = json_loads or default_json_loads
+        self._clock = clock
+        self.logger = logger or logging.getLogger(__name__)
         self._handler_dict = {}
+        self.deduplicator = EventDeduplicator(window=dedup_window, maxsize=dedup_size)
+        self.dispatcher = dispatcher or EventDispatcher(
+            workers=int(os.getenv('SLACK_EVENT_WORKERS', 8)),
+            high_water_mark=int(os.getenv('SLACK_EVENT_HIGH_WATER_MARK', 1000)),
+            ordered=os.getenv('SLACK_EVENT_ORDERED', '').lower() in ('1', 'true', 'yes'),
+        )
+        self.retries_received = 0
 
-    async def verify_request(self, request):
-        if not request.can_read_body:
+    @property
+    def can_verify(self):
+        return self._signing_hmac is not None
+
+    def verify_signature(self, timestamp, body, slack_signature):
+        if not self.can_verify:
+            return False
+        try:
+            if abs(self._clock() - int(timestamp)) > self._replay_window:
+                return False
+        except ValueError:
             return False
+        signing_hmac = self._signing_hmac.copy()
+        signing_hmac.update(timestamp.encode())
+        signing_hmac.update(b':')
+        signing_hmac.update(body)
+        return hmac.compare_digest('v0={}'.format(signing_hmac.hexdigest()), slack_signature)
+
+    async def read_event(self, request):
+        if not request.can_read_body:
+            return None
         timestamp = request.headers.get('X-Slack-Request-Timestamp', '')
         slack_signature = request.headers.get('X-Slack-Signature', '')
-        request_body = await request.text()
-        sig_basestring = 'v0:{}:{}'.format(timestamp, request_body)
-        signature = 'v0={}'.format(hmac.new(self._slack_signing_secret.encode(),
-                                   sig_basestring.encode(),
-                                   hashlib.sha256).hexdigest())
-        return hmac.compare_digest(signature, slack_signature)
+        body = await request.read()
+        if not self.verify_signature(timestamp, body, slack_signature):
+            return None
+        return self._json_loads(body)
+
+    async def verify_request(self, request):
+        return await self.read_event(request) is not None
 
     async def handle_event(self, request):
-        if not await self.verify_request(request):
+        start = time.perf_counter()
+        try:
+            return await self._handle_event(request)
+        finally:
+            metrics.SLACK_EVENT_DURATION.observe(time.perf_counter() - start)
+
+    async def _handle_event(self, request):
+        data = await self.read_event(request)
+        if data is None:
+            metrics.SLACK_EVENTS.inc('forbidden')
+            self.logger.debug('Rejected unsigned Slack request', extra={'platform': 'slack', 'outcome': 'forbidden'})
             raise web.HTTPForbidden()
-        data = await request.json()
+        return web.Response(text=self.dispatch_event(data, retry='X-Slack-Retry-Num' in request.headers))
+
+    def dispatch_event(self, data, retry=False):
         request_type = data['type']
         if request_type == 'url_verification':
-            return web.Response(text=data['challenge'])
+            metrics.SLACK_EVENTS.inc(request_type)
+            return data['challenge']
         elif request_type != 'event_callback':
-            return web.Response(text='ok')
+            metrics.SLACK_EVENTS.inc(request_type)
+            return 'ok'
+
+        if retry:
+            self.retries_received += 1
+        if self.deduplicator.blocking:
+            # Checked after the ack has been sent, so disk and lock waits never delay it.
+            if not self.dispatcher.submit(self._deduplicate, data, key=data['event'].get('channel')):
+                self._log_event(data, 'shed')
+        elif self.deduplicator.is_duplicate(data.get('event_id')):
+            self._log_event(data, 'duplicate')
+        else:
+            self._dispatch(data)
+        return 'ok'
+
+    # Runs the handlers in this dispatcher worker rather than queueing them again, so events
+    # already acked still get handled while the dispatcher drains on shutdown.
+    async def _deduplicate(self, data):
+        if await self.deduplicator.is_duplicate_async(data.get('event_id')):
+            self._log_event(data, 'duplicate')
+            return
         event_type = data['event']['type']
+        metrics.SLACK_EVENTS.inc(event_type)
+        self._log_event(data, 'dispatched')
+        for handler in self._handler_dict.get(event_type, ()):
+            if asyncio.iscoroutinefunction(handler):
+                await handler(data)
+            else:
+                handler(data)
 
+    def _dispatch(self, data):
+        event = data['event']
+        event_type = event['type']
+        outcome = 'dispatched'
+        metrics.SLACK_EVENTS.inc(event_type)
         if event_type in self._handler_dict:
             for handler in self._handler_dict[event_type]:
                 if asyncio.iscoroutinefunction(handler):
-                    asyncio.ensure_future(handler(data))
+                    if not self.dispatcher.submit(handler, data, key=event.get('channel')):
+                        outcome = 'shed'
                 else:
                     handler(data)
+        self._log_event(data, outcome)
+
+    def _log_event(self, data, outcome):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            event = data['event']
+            self.logger.debug('Slack event %s', outcome, extra={
+                'platform': 'slack',
+                'event_type': event['type'],
+                'event_id': data.get('event_id'),
+                'team': data.get('team_id'),
+                'channel': event.get('channel'),
+                'outcome': outcome,
+            })
+
+    async def start(self, _=None):
+        self.dispatcher.start()
 
-        return web.Response(text='ok')
+    def collect_metrics(self):
+        dispatcher = self.dispatcher
+        return [
+            ('joonbot_slack_retries_total', 'counter', 'Slack event redeliveries received.',
+             [({}, self.retries_received)]),
+            ('joonbot_slack_duplicates_total', 'counter', 'Redelivered Slack events dropped.',
+             [({}, self.deduplicator.duplicates)]),
+            ('joonbot_dispatch_queue_depth', 'gauge', 'Slack events waiting for a worker.',
+             [({}, dispatcher.depth)]),
+            ('joonbot_dispatch_in_flight', 'gauge', 'Slack events being handled.',
+             [({}, dispatcher.in_flight)]),
+            ('joonbot_dispatch_events_total', 'counter', 'Slack events by dispatch result.',
+             [({'result': 'processed'}, dispatcher.processed),
+              ({'result': 'failed'}, dispatcher.failed),
+              ({'result': 'shed'}, dispatcher.shed)]),
+            ('joonbot_dispatch_wait_seconds', 'gauge', 'Time Slack events waited in the queue.',
+             [({'stat': 'mean'}, dispatcher.mean_wait), ({'stat': 'max'}, dispatcher.max_wait)]),
+        ]
+
+    async def close(self, _=None):
+        await self.dispatcher.close()
+        if self.deduplicator.blocking:
+            self.deduplicator.close()
 
     def register_handler(self, event_type, func):
         self._handler_dict.setdefault(event_type, []).append(func)
@@ -61,13 +194,17 @@ class SlackEventHandler:
         return decorator
 
 
+log_pipeline = LogPipeline.from_env()
 slack_event_handler = SlackEventHandler()
-slack_event_handler.register_handler('message', joonbot.message_handler)
+slack_event_handler.register_handler('message', slack_tenants.message_handler)
+plugin_watcher = PluginWatcher(joonbot, interval=float(os.getenv('JOONBOT_RELOAD_INTERVAL', 2)))
 
 
 # 슬랙 버그로 인해 커맨드 삭제
 # @slack_event_handler.on('reaction_added')
 async def no_touch(data):
+    import slack
+
     client = slack.WebClient(token=os.getenv('SLACK_API_TOKEN'), run_async=True)
     reaction = data['event']['reaction']
     user = data['event']['user']
@@ -92,8 +229,99 @@ async def no_touch(data):
         )
 
 
+def collect_joonbot_metrics():
+    outbound = joonbot.outbound
+    caches = [
+        ('slack_users', joonbot.user_cache),
+        ('air_pollution', fetch_air_pollution.cache),
+        ('minecraft', minecraft_client.cache),
+    ]
+    return [
+        ('joonbot_outbound_queue_depth', 'gauge', 'Messages waiting to be posted.',
+         [({'platform': joonbot.platform}, outbound.depth)]),
+        ('joonbot_outbound_messages_total', 'counter', 'Outbound messages by result.',
+         [({'platform': joonbot.platform, 'result': 'sent'}, outbound.sent),
+          ({'platform': joonbot.platform, 'result': 'posts'}, outbound.posts),
+          ({'platform': joonbot.platform, 'result': 'rate_limited'}, outbound.rate_limited)]),
+        ('joonbot_error_reports_total', 'counter', 'Error reports by result.',
+         [({'result': 'reported'}, joonbot.error_reporter.reported),
+          ({'result': 'aggregated'}, joonbot.error_reporter.aggregated),
+          ({'result': 'suppressed'}, joonbot.error_reporter.suppressed)]),
+        ('joonbot_cache_requests_total', 'counter', 'Cache lookups by result.',
+         [({'cache': name, 'result': result}, getattr(cache, result))
+          for name, cache in caches for result in ('hits', 'misses', 'stale_hits', 'errors')]),
+        ('joonbot_cache_entries', 'gauge', 'Entries held by each cache.',
+         [({'cache': name}, len(cache)) for name, cache in caches]),
+        ('joonbot_subscriptions', 'gauge', 'Scheduled air pollution subscriptions.',
+         [({}, len(air_pollution_subscriptions))]),
+        ('joonbot_subscription_deliveries_total', 'counter', 'Subscription deliveries by result.',
+         [({'result': 'fetches'}, air_pollution_subscriptions.fetches),
+          ({'result': 'delivered'}, air_pollution_subscriptions.delivered),
+          ({'result': 'failed'}, air_pollution_subscriptions.failed)]),
+        ('joonbot_slack_tenants', 'gauge', 'Slack workspaces with a bot instance.',
+         [({}, len(slack_tenants))]),
+        ('joonbot_slack_unknown_team_events_total', 'counter', 'Slack messages from teams without a token.',
+         [({}, slack_tenants.unknown_teams)]),
+        ('joonbot_rate_limit_buckets', 'gauge', 'Token buckets held by the command rate limiter.',
+         [({'platform': joonbot.platform}, len(joonbot.rate_limiter) if joonbot.rate_limiter else 0)]),
+    ]
+
+
+async def metrics_view(_):
+    return web.Response(text=metrics.registry.render(), content_type='text/plain')
+
+
+async def healthz_view(_):
+    return web.Response(text='ok')
+
+
+async def start_http_client(server_app):
+    http_client = HttpClient(
+        limit=int(os.getenv('HTTP_POOL_LIMIT', 100)),
+        limit_per_host=int(os.getenv('HTTP_POOL_LIMIT_PER_HOST', 20)),
+        timeout=float(os.getenv('HTTP_TIMEOUT', 10)),
+    )
+    await http_client.start()
+    joonbot.use_http(http_client)
+    server_app['http_client'] = http_client
+
+
+async def cleanup_http_client(server_app):
+    await server_app['http_client'].close()
+
+
+# noinspection PyBroadException
+async def warm_slack_cache(server_app):
+    async def warm_up():
+        try:
+            await joonbot.warm_user_cache()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            joonbot.logger.exception('Failed to warm up Slack user cache.')
+
+    server_app['slack_cache_warm_up'] = asyncio.ensure_future(warm_up())
+
+
+async def cleanup_slack_cache(server_app):
+    warm_up = server_app['slack_cache_warm_up']
+    warm_up.cancel()
+    await asyncio.gather(warm_up, return_exceptions=True)
+
+
+async def cleanup_joonbot(_):
+    await slack_tenants.close()
+    await joonbot.error_reporter.close()
+    await joonbot.outbound.close()
+
+
 async def start_discord_bot(server_app):
-    discord_joonbot = DiscordBot.clone(joonbot, token=os.getenv('DISCORD_BOT_TOKEN'))
+    discord_joonbot = DiscordBot.clone(
+        joonbot,
+        token=os.getenv('DISCORD_BOT_TOKEN'),
+        lean=os.getenv('DISCORD_PROFILE', 'lean') == 'lean',
+        max_messages=int(os.getenv('DISCORD_MAX_MESSAGES', 0)) or None,
+    )
 
     @discord_joonbot.client.event
     async def on_member_join(member):
@@ -120,7 +348,7 @@ async def start_discord_bot(server_app):
             if comb_optim_channel is not None:
                 message += '{} - {} 과 함께하는 조합최적화 스터디 채널\n'.format(
                     comb_optim_channel.mention,
-                    guild.owner.mention
+                    '<@{}>'.format(guild.owner_id),
                 )
             if minecraft_channel is not None:
                 message += '{} - 마인크래프트를 즐기는 채널'.format(minecraft_channel.mention)
@@ -135,9 +363,87 @@ async def cleanup_discord_bot(server_app):
     await server_app['discord_bot']
 
 
-app = web.Application()
-app.on_startup.append(start_discord_bot)
-app.on_cleanup.append(cleanup_discord_bot)
-app.add_routes([
-    web.post('/slack/events', slack_event_handler.handle_event)
-])
+async def start_socket_mode(server_app):
+    app_token = os.getenv('SLACK_APP_TOKEN')
+    if not app_token:
+        raise ValueError('Slack app-level token not found.')
+    receiver = SocketModeReceiver(
+        slack_event_handler,
+        app_token,
+        connections=int(os.getenv('SLACK_SOCKET_CONNECTIONS', 2)),
+    )
+    await receiver.start()
+    server_app['socket_mode'] = receiver
+
+
+async def cleanup_socket_mode(server_app):
+    await server_app['socket_mode'].close()
+
+
+def configure_worker(index, workers):
+    if workers <= 1:
+        return
+    deduplicator = slack_event_handler.deduplicator
+    slack_event_handler.deduplicator = SqliteEventDeduplicator(
+        os.getenv('SLACK_DEDUP_DB', os.path.join(tempfile.gettempdir(), 'joonbot-events.sqlite3')),
+        window=deduplicator.window,
+        maxsize=deduplicator.maxsize,
+    )
+    joonbot.outbound.partition(workers)
+    if joonbot.rate_limiter is not None:
+        joonbot.rate_limiter.partition(workers)
+    joonbot.error_reporter.partition(workers)
+    # `reload` run in one worker reaches the others through this file.
+    plugin_watcher.trigger = os.getenv(
+        'JOONBOT_RELOAD_TRIGGER', os.path.join(tempfile.gettempdir(), 'joonbot-reload'),
+    )
+    metrics.registry.register_collector(lambda: [
+        ('joonbot_worker', 'gauge', 'Index of the worker process serving this scrape.', [({'worker': index}, 1)]),
+    ])
+
+
+def create_app(discord=True, slack_mode='http', scheduler=True, reload=False, warm_up=True):
+    if slack_mode == 'http' and not slack_event_handler.can_verify:
+        raise ValueError('Slack signing secret not found.')
+    server_app = web.Application()
+    server_app.on_startup.append(log_pipeline.start)
+    server_app.on_startup.append(start_http_client)
+    server_app.on_startup.append(slack_event_handler.start)
+    if slack_mode == 'socket':
+        server_app.on_startup.append(start_socket_mode)
+        server_app.on_cleanup.append(cleanup_socket_mode)
+    if warm_up:
+        server_app.on_startup.append(warm_slack_cache)
+        server_app.on_startup.append(covid19_dataset.start)
+    if scheduler:
+        server_app.on_startup.append(air_pollution_subscriptions.start)
+    if discord:
+        server_app.on_startup.append(start_discord_bot)
+    plugin_watcher.watch_package = reload
+    if reload or plugin_watcher.trigger:
+        server_app.on_startup.append(plugin_watcher.start)
+        server_app.on_cleanup.append(plugin_watcher.close)
+    server_app.on_cleanup.append(slack_event_handler.close)
+    if scheduler:
+        server_app.on_cleanup.append(air_pollution_subscriptions.close)
+    server_app.on_cleanup.append(cleanup_joonbot)
+    if warm_up:
+        server_app.on_cleanup.append(cleanup_slack_cache)
+        server_app.on_cleanup.append(covid19_dataset.close)
+    if discord:
+        server_app.on_cleanup.append(cleanup_discord_bot)
+    server_app.on_cleanup.append(minecraft_client.close)
+    server_app.on_cleanup.append(cleanup_http_client)
+    server_app.on_cleanup.append(log_pipeline.close)
+    if slack_mode == 'http':
+        server_app.router.add_post('/slack/events', slack_event_handler.handle_event)
+    server_app.add_routes([
+        web.get('/metrics', metrics_view),
+        web.get('/healthz', healthz_view),
+    ])
+    return server_app
+
+
+metrics.registry.register_collector(slack_event_handler.collect_metrics)
+metrics.registry.register_collector(collect_joonbot_metrics)
+metrics.registry.register_collector(log_pipeline.collect_metrics)
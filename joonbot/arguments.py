@@ -0,0 +1,108 @@
+import inspect
+import re
+
+from .exceptions import ArgumentError
+
+# <@U123|name>, <#C123|general>, <!here>, <http://example.com|example.com>, <@!123> (Discord)
+_SLACK_ENTITY = re.compile(r'<([@#!]?)([^<>|]*)(?:\|([^<>]*))?>')
+_TOKEN = re.compile(r'"([^"]*)"|\'([^\']*)\'|“([^”]*)”|‘([^’]*)’|(\S+)')
+_SPECIAL = re.compile('[<"\'“‘]')
+
+
+def _unwrap_entity(m):
+    sigil, target, label = m.groups()
+    if sigil in ('@', '#'):
+        return target.lstrip('!&')
+    # <!here> has no label; Slack auto-links bare host names, so the label is what the user typed.
+    return label or target
+
+
+def unwrap(text):
+    return _SLACK_ENTITY.sub(_unwrap_entity, text) if '<' in text else text
+
+
+def tokenize(text):
+    if _SPECIAL.search(text) is None:
+        return text.split()
+    # Exactly one alternative matches, so lastindex is the group holding the token.
+    return [m.group(m.lastindex) for m in _TOKEN.finditer(unwrap(text))]
+
+
+# Annotation for a parameter that consumes every remaining token, joined by single spaces.
+class Text(str):
+    pass
+
+
+def choice(*options):
+    allowed = frozenset(options)
+    message = '{} 중 하나를 입력해 주세요.'.format(', '.join(options))
+
+    def convert(token):
+        if token not in allowed:
+            raise ArgumentError(message)
+        return token
+    convert.__name__ = '|'.join(options)
+    return convert
+
+
+def _converter(annotation):
+    if annotation is inspect.Parameter.empty or annotation is Text:
+        return str
+    return annotation
+
+
+def _convert(converters, token):
+    for convert in converters:
+        try:
+            return convert(token)
+        except ArgumentError:
+            if len(converters) == 1:
+                raise
+        except (ValueError, TypeError):
+            pass
+    raise ArgumentError('`{}` 값이 올바르지 않습니다.'.format(token))
+
+
+# Commands taking *args keep receiving raw whitespace-split tokens and get no parser.
+def compile_parser(func):
+    parameters = list(inspect.signature(func).parameters.values())
+    if any(parameter.kind == parameter.VAR_POSITIONAL for parameter in parameters):
+        return None
+    positional = [
+        parameter for parameter in parameters
+        if parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD)
+    ]
+    # The first positional parameter receives the alias the command was invoked with.
+    specs = []
+    for parameter in positional[1:]:
+        annotation = parameter.annotation
+        annotations = annotation if isinstance(annotation, tuple) else (annotation,)
+        specs.append((
+            parameter.name,
+            tuple(_converter(a) for a in annotations),
+            Text in annotations,
+            parameter.default is parameter.empty,
+            parameter.default,
+        ))
+    specs = tuple(specs)
+
+    def parse(tokens):
+        args = [tokens[0]]
+        index = 1
+        for name, converters, rest, required, default in specs:
+            if index >= len(tokens):
+                if required:
+                    raise ArgumentError('`{}` 값을 입력해 주세요.'.format(name))
+                args.append(default)
+                continue
+            if rest:
+                token = ' '.join(tokens[index:])
+                index = len(tokens)
+            else:
+                token = tokens[index]
+                index += 1
+            args.append(_convert(converters, token))
+        if index < len(tokens):
+            raise ArgumentError('인자가 너무 많습니다.')
+        return args
+    return parse
@@ -1,11 +1,12 @@
 import os
-import random
-import re
-
-import aiohttp
 
+from .cache import cached
 from .core import SlackBot
-from .exceptions import MessageHandleAborted
+from .covid19 import Covid19Dataset
+from .minecraft import MinecraftStatusClient
+from .plugin import load_plugins
+from .scheduler import SubscriptionScheduler, SubscriptionStore
+from .tenants import SlackTenants, StaticTokenStore
 
 
 joonbot = SlackBot(
@@ -22,73 +23,26 @@ joonbot = SlackBot(
 )
 
 
-@joonbot.on_signal(SlackBot.PRE_MESSAGE_SIGNAL)
-async def ignore_bot(bot, user, **_):
-    if await bot.is_bot(user):
-        raise MessageHandleAborted('bot')
-
-
-@joonbot.command(aliases=['help', '?'])
-async def help_message(*args, bot, user, channel, **_):
-    """ 이 메세지(도움말)을 보여줍니다."""
-    message = ''
-    sorted_commands = sorted(bot.commands, key=lambda func: func.aliases[0])
-
-    help_list = args[1:]
-
-    for f in sorted_commands:
-        if f.group == '__all__' or user in f.group:
-            if not help_list or set(help_list).intersection(set(f.aliases)):
-                message += '*{}* : {}\n'.format('/'.join(f.aliases), f.__doc__)
-
-    await bot.send_message(channel=channel, text=message)
-
-
-@joonbot.on_signal(SlackBot.INVALID_COMMAND_SIGNAL)
-async def unknown_msg(bot, channel, reason, **_):
-    if reason == SlackBot.REASON_INVALID_ARGUMENT:
-        message = '잘못된 사용법입니다.\n'
-    else:
-        message = '존재하지 않는 커맨드이거나 권한이 없습니다.\n'
-    message += '자세한 사용법은 help 커맨드를 통해 확인해 주세요.'
-    await bot.send_message(channel=channel, text=message)
-
-
-@joonbot.command(aliases=['echo', '에코'])
-async def echo(*args, bot, channel, **_):
-    """ 흔한 echo """
-    revised_text = ' '.join(args[1:])
-    await bot.send_message(channel=channel, text=revised_text)
-
-
-@joonbot.command(aliases=['dust', '미세먼지'])
-async def air_pollution(*args, bot, channel, **_):
-    """ 실시간 미세먼지 정보 / Usage: _미세먼지 측정소_"""
-    if len(args) == 1:
-        await bot.send_message(channel=channel, text='측정소를 입력해 주세요.')
-        return
-
-    station = args[1]
-
-    api_url = 'http://openapi.airkorea.or.kr/openapi/services/rest/ArpltnInforInqireSvc/getMsrstnAcctoRltmMesureDnsty'
+@cached(maxsize=256, ttl=60, stale_ttl=600, key=lambda http, station: station)
+async def fetch_air_pollution(http, station):
+    api_url = os.getenv(
+        'AIRKOREA_API_URL',
+        'http://openapi.airkorea.or.kr/openapi/services/rest/ArpltnInforInqireSvc/getMsrstnAcctoRltmMesureDnsty',
+    )
     service_key = os.getenv('OPENAPI_SERVICE_KEY')
 
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(api_url, params={
-                'serviceKey': service_key,
-                'numOfRows': 10,
-                'pageNo': 1,
-                'stationName': station,
-                'dataTerm': 'DAILY',
-                'ver': '1.3',
-                '_returnType': 'json',
-            }) as resp:
-                resp_json = await resp.json(content_type=None)
-    except aiohttp.ClientError:
-        await bot.send_message(channel=channel, text='현재 사용할 수 없는 기능입니다.')
-        return
+    return await http.get_json(api_url, params={
+        'serviceKey': service_key,
+        'numOfRows': 10,
+        'pageNo': 1,
+        'stationName': station,
+        'dataTerm': 'DAILY',
+        'ver': '1.3',
+        '_returnType': 'json',
+    })
+
 
+def air_pollution_message(station, resp_json):
     air_level = [
         '매우좋음 :blobaww:',
         '좋음 :smile:',
@@ -120,13 +74,36 @@ async def air_pollution(*args, bot, channel, **_):
         else:
             message = '해당 측정소가 존재하지 않습니다'
 
-    await bot.send_message(channel=channel, text=message)
+    return message
+
+
+async def render_air_pollution(station):
+    return air_pollution_message(station, await fetch_air_pollution(joonbot.http, station))
+
+
+slack_tenants = SlackTenants(joonbot, StaticTokenStore.from_env() if os.getenv('SLACK_TEAM_TOKENS') else None)
+
+
+async def deliver_subscription(subscription, text):
+    tenant_bot = await slack_tenants.get(subscription.team)
+    if tenant_bot is None:
+        raise LookupError('No Slack token for team {}.'.format(subscription.team))
+    await tenant_bot.send_message(channel=subscription.channel, text=text)
+
+
+air_pollution_subscriptions = SubscriptionScheduler(
+    SubscriptionStore(os.getenv('SUBSCRIPTION_DB', 'subscriptions.sqlite3')),
+    fetch=render_air_pollution,
+    deliver=deliver_subscription,
+)
 
 
 # 마스크 대란 해소로 커맨드 삭제
 # @joonbot.command(aliases=['mask', '마스크', '마스크정보'])
 async def mask(*args, **kwargs):
     """ 실시간 마스크 판매 현황 """
+    import aiohttp
+
     bot = kwargs['bot']
     data = kwargs['event']
     channel_id = data['channel']
@@ -201,155 +178,23 @@ async def mask(*args, **kwargs):
     await bot.client.chat_postMessage(channel=channel_id, text=message, as_user=True)
 
 
-@joonbot.command(aliases=['covid19', 'corona', 'coronavirus', '코로나', '신종코로나', '코로나바이러스', '코로나19'])
-async def covid19(*args, bot, channel, **_):
-    """ 준 실시간 코로나바이러스19 전세계 감염 현황 """
-    if len(args) > 1:
-        arg = ' '.join(args[1:])
-        try:
-            page = int(arg)
-            country = None
-        except ValueError:
-            page = 1
-            country = arg
-    else:
-        page = 1
-        country = None
-
-    api_url = 'https://coronavirus-monitor.p.rapidapi.com/coronavirus/cases_by_country.php'
+async def fetch_covid19(http):
+    api_url = os.getenv(
+        'RAPIDAPI_COVID19_URL',
+        'https://coronavirus-monitor.p.rapidapi.com/coronavirus/cases_by_country.php',
+    )
     api_key = os.getenv('RAPIDAPI_KEY')
 
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(api_url, headers={
-                'x-rapidapi-host': 'coronavirus-monitor.p.rapidapi.com',
-                'x-rapidapi-key': api_key,
-            }) as resp:
-                resp_json = await resp.json(content_type=None)
-    except aiohttp.ClientError:
-        await bot.send_message(channel=channel, text='현재 사용할 수 없는 기능입니다.')
-        return
-
-    stats = sorted(resp_json['countries_stat'], key=lambda c: int(c['cases'].replace(',', '')), reverse=True)
-    num_countries = len(stats)
-
-    if country:
-        for stat in stats:
-            if stat['country_name'] == country:
-                message = '*{}* COVID-19 감염 현황\n'.format(country)
-                message += '*확진*: {}\n'.format(stat['cases'])
-                message += '*사망*: {}\n'.format(stat['deaths'])
-                message += '*완치*: {}\n'.format(stat['total_recovered'])
-                break
-        else:
-            await bot.send_message(channel=channel, text='국가를 찾을 수 없습니다.')
-            return
-    else:
-        pagination = 20
-        num_pages = (num_countries - 1) // pagination + 1
-        page = min(max(page, 1), num_pages)
-        start = pagination * (page - 1)
-        end = min(num_countries, pagination * page)
-
-        message = '전세계 COVID-19 감염 현황 (페이지: {} / {})\n'.format(page, num_pages)
-        message += '*주의*: 실시간과 다소 차이가 있을 수 있음\n\n'
-        message += '국가: 확진 / 사망 / 완치\n'
-        message += '----------------------------\n'
-
-        stat_list = []
-        for i in range(start, end):
-            stat = stats[i]
-            stat_list.append('{}: {} / {} / {}'.format(
-                stat['country_name'],
-                stat['cases'],
-                stat['deaths'],
-                stat['total_recovered'],
-            ))
-        message += '\n'.join(stat_list)
-
-    await bot.send_message(channel=channel, text=message)
-
-
-@joonbot.command(aliases=['mcstatus', 'mc', 'minecraft', 'mcserver', '마크', '마인크래프트', '마크서버'])
-async def minecraft(*args, bot, channel, **_):
-    """ 마인크래프트 서버 확인 """
-    if len(args) < 2:
-        await bot.send_message(channel=channel, text='서버 주소를 입력해주세요.')
-        return
-
-    address = args[1]
-    if len(args) >= 3:
-        method = args[2]
-    else:
-        method = 'status'
+    return await http.get_json(api_url, headers={
+        'x-rapidapi-host': 'coronavirus-monitor.p.rapidapi.com',
+        'x-rapidapi-key': api_key,
+    })
 
-    m = re.match(r'<.+\|(?P<addr>.+)>$', address)
-    if m:
-        address = m.group('addr')
 
-    from mcstatus import MinecraftServer
-
-    try:
-        server = MinecraftServer.lookup(address)
-        if method == 'status':
-            status = server.status()
-            message = 'Minecraft server `{}:{}`\n'.format(server.host, server.port)
-            message += '*Version*: {} (protocol {})\n'.format(status.version.name, status.version.protocol)
-            message += '*Description*: {}\n'.format(status.description)
-            message += '*Players online* ({} / {})'.format(status.players.online, status.players.max)
-            player_list = status.players.sample
-            if player_list:
-                message += ':\n'
-                message += '\n'.join(['- {} (`{}`)'.format(player.name, player.id) for player in player_list])
-        elif method == 'ping':
-            latency = server.ping()
-            message = 'Minecraft server `{}:{}`\n'.format(server.host, server.port)
-            message += '*Ping*: {} ms\n'.format(latency)
-        elif method == 'query':
-            query = server.query()
-            message = 'Minecraft server `{}:{}`\n'.format(server.host, server.port)
-            message += '*Software*: {} {}\n'.format(query.software.brand, query.software.version)
-            message += '*Plugins:'
-            if query.software.plugins:
-                message += '\n'.join(['- {}'.format(plugin) for plugin in query.software.plugins])
-            else:
-                message += 'none'
-            message += '\n'
-            message += '*MOTD*: `{}`\n'.format(query.motd)
-            message += '*Players online* ({} / {})'.format(query.players.online, query.players.max)
-            player_list = query.players.names
-            if player_list:
-                message += ':\n'
-                message += '\n'.join(['- {}'.format(name) for name in query.players.names])
-        else:
-            message = 'status, ping, query 중 하나를 입력해 주세요.'
-    except OSError:
-        message = '서버 주소를 찾을 수 없거나 서버가 응답하지 않았습니다.'
-    except ValueError:
-        message = '서버에 오류가 있는 것 같습니다.'
-
-    await bot.send_message(channel=channel, text=message)
-
-
-@joonbot.command(aliases=['hello', 'hi', '하이', 'ㅎㅇ', '안녕', '안뇽'])
-async def hello(*_, bot, channel, **__):
-    """ 준봇에게 인사합니다. """
-    messages = [
-        'ㅎㅇㅎㅇ',
-        '안녕하세요! 저는 준봇이에요.',
-        '준봇 여기있습니다!',
-        '부르셨나요?',
-        'ㅎㅇ',
-        'no',
-        '하위^^',
-    ]
+covid19_dataset = Covid19Dataset(lambda: fetch_covid19(joonbot.http), refresh_interval=300)
 
-    await bot.send_message(channel=channel, text=random.choice(messages))
 
+minecraft_client = MinecraftStatusClient()
 
-@joonbot.command(aliases=['version', '버전'])
-async def bot_version(*_, bot, channel, **__):
-    """ 준봇의 버전을 확인합니다. """
-    from . import __version__
 
-    await bot.send_message(channel=channel, text='joonbot {}'.format(__version__))
+load_plugins(joonbot)
@@ -0,0 +1,140 @@
+import asyncio
+import functools
+import time
+from collections import OrderedDict, namedtuple
+
+
+_Entry = namedtuple('_Entry', ['fresh_until', 'expires_at', 'value', 'is_error'])
+
+
+class TTLCache:
+    def __init__(self, maxsize=1024, ttl=300, error_ttl=0, stale_ttl=0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._pending = {}
+        self._refreshing = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.errors = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self._lookup(key) is not None
+
+    def _lookup(self, key, allow_stale=False):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        now = self._clock()
+        if entry.expires_at <= now:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        if not allow_stale and entry.fresh_until <= now:
+            return None
+        return entry
+
+    @staticmethod
+    def _unwrap(entry):
+        if entry.is_error:
+            raise entry.value
+        return entry.value
+
+    def _store(self, key, value, ttl, stale_ttl, is_error):
+        fresh_until = self._clock() + ttl
+        self._data[key] = _Entry(fresh_until, fresh_until + stale_ttl, value, is_error)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get(self, key, default=None):
+        entry = self._lookup(key)
+        if entry is None:
+            return default
+        return self._unwrap(entry)
+
+    def set(self, key, value, ttl=None):
+        self._store(key, value, self.ttl if ttl is None else ttl, self.stale_ttl, False)
+
+    def set_error(self, key, error, ttl=None):
+        self._store(key, error, self.error_ttl if ttl is None else ttl, 0, True)
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    async def get_or_fetch(self, key, fetch):
+        entry = self._lookup(key, allow_stale=True)
+        if entry is not None:
+            if entry.fresh_until > self._clock():
+                self.hits += 1
+                return self._unwrap(entry)
+            if not entry.is_error:
+                # Stale while revalidate: answer right away and refresh once in the background.
+                self.stale_hits += 1
+                if key not in self._refreshing:
+                    self._refreshing[key] = asyncio.ensure_future(self._refresh(key, fetch))
+                return entry.value
+        self.misses += 1
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(key, fetch))
+            self._pending[key] = future
+        return await asyncio.shield(future)
+
+    async def _fetch(self, key, fetch):
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.errors += 1
+            if self.error_ttl:
+                self.set_error(key, e)
+            raise
+        else:
+            self.set(key, value)
+            return value
+        finally:
+            self._pending.pop(key, None)
+
+    # noinspection PyBroadException
+    async def _refresh(self, key, fetch):
+        try:
+            self.set(key, await fetch())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.errors += 1
+            stale = self._data.get(key)
+            if stale is not None and not stale.is_error and self.error_ttl:
+                # Keep answering with the old value and leave upstream alone for error_ttl.
+                self._data[key] = stale._replace(fresh_until=self._clock() + self.error_ttl)
+        finally:
+            self._refreshing.pop(key, None)
+
+
+def cached(cache=None, key=None, **cache_options):
+    def decorator(f):
+        f_cache = cache or TTLCache(**cache_options)
+
+        @functools.wraps(f)
+        async def wrapper(*args, **kwargs):
+            if key is None:
+                cache_key = (args, tuple(sorted(kwargs.items())))
+            else:
+                cache_key = key(*args, **kwargs)
+            return await f_cache.get_or_fetch(cache_key, lambda: f(*args, **kwargs))
+
+        wrapper.cache = f_cache
+        return wrapper
+    return decorator
@@ -1,15 +1,99 @@
 import asyncio
+import copy
 import logging
-import traceback
-
-import discord
-import slack
-
-from .exceptions import CommandNotFound, MessageHandleAborted
+import re
+import sys
+import time
+import weakref
+
+from . import metrics
+from .arguments import compile_parser, tokenize
+from .cache import TTLCache
+from .exceptions import ArgumentError, CommandNotFound, MessageHandleAborted
+from .http import HttpClient
+from .logs import log_fields
+from .outbound import SendScheduler
+from .plugin import LazyCommand
+from .ratelimit import CommandRateLimiter
+from .reporting import ErrorReporter
+
+
+class CommandRouter:
+    _END = ''
+    _ALIAS_PATTERN = re.compile(r'\s*(\S+)')
+
+    def __init__(self, triggers, commands):
+        self._trie = {}
+        for index, trigger in enumerate(triggers):
+            node = self._trie
+            for char in trigger:
+                node = node.setdefault(char, {})
+            node.setdefault(self._END, (index, len(trigger)))
+        self._commands = dict(commands)
+
+    def match_trigger(self, text):
+        node = self._trie
+        best = node.get(self._END)
+        for char in text:
+            node = node.get(char)
+            if node is None:
+                break
+            terminal = node.get(self._END)
+            if terminal is not None and (best is None or terminal[0] < best[0]):
+                best = terminal
+        return None if best is None else best[1]
+
+    def match(self, text):
+        end = self.match_trigger(text)
+        if end is None:
+            return None
+        m = self._ALIAS_PATTERN.match(text, end)
+        return end, (m.group(1) if m else None)
+
+    def get(self, alias):
+        return self._commands.get(alias)
+
+
+class HelpIndex:
+    LINE_FORMAT = '*{}* : {}\n'
+
+    def __init__(self, commands):
+        self._commands = sorted(commands, key=lambda cmd: cmd.aliases[0])
+        self._lines = [self.LINE_FORMAT.format('/'.join(cmd.aliases), cmd.__doc__) for cmd in self._commands]
+        self._alias_index = {}
+        members = set()
+        for i, cmd in enumerate(self._commands):
+            for alias in cmd.aliases:
+                self._alias_index.setdefault(alias, []).append(i)
+            if cmd.group != '__all__':
+                members.update(cmd.group)
+
+        self._public = self._render([i for i, cmd in enumerate(self._commands) if cmd.group == '__all__'])
+        views = {}
+        self._user_views = {}
+        for user in members:
+            visible = tuple(i for i in range(len(self._commands)) if self._permitted(i, user))
+            if visible not in views:
+                views[visible] = self._render(visible)
+            self._user_views[user] = views[visible]
+
+    def _permitted(self, i, user):
+        group = self._commands[i].group
+        return group == '__all__' or user in group
+
+    def _render(self, indices):
+        return ''.join(self._lines[i] for i in indices)
+
+    def render(self, user, aliases=None):
+        if not aliases:
+            return self._user_views.get(user, self._public)
+        indices = sorted({i for alias in aliases for i in self._alias_index.get(alias, ())})
+        return self._render(i for i in indices if self._permitted(i, user))
 
 
 class ChatBot:
     PRE_MESSAGE_SIGNAL = 'pre_message'
+    TRIGGERED_SIGNAL = 'triggered'
     PRE_COMMAND_SIGNAL = 'pre_command'
     INVALID_COMMAND_SIGNAL = 'invalid_command'
     POST_COMMAND_SIGNAL = 'post_command'
@@ -17,6 +101,7 @@ class ChatBot:
     REASON_NOT_FOUND = 'not_found'
     REASON_NO_PERMISSION = 'no_permission'
     REASON_INVALID_ARGUMENT = 'invalid_argument'
+    REASON_RATE_LIMITED = 'rate_limited'
 
     PLATFORM = None
 
@@ -27,8 +112,14 @@ class ChatBot:
                  channels='__all__',
                  report_channels=None,
                  logger=None,
+                 outbound=None,
+                 http=None,
+                 error_reporting=None,
+                 rate_limits=None,
                  ):
         self.name = name
+        self._router = None
+        self._help_index = None
         self.triggers = triggers or ['{} '.format(self.name)]
         self._commands = {}
         self._commands_meta = []
@@ -37,6 +128,14 @@ class ChatBot:
         self.report_channels = report_channels or []
         self.logger = logger or logging.getLogger(name)
         self._signal_handler = {}
+        self._signal_pipeline = {}
+        self._registry_shared = False
+        self._followers = weakref.WeakSet()
+        self.http = http or HttpClient()
+        self.error_reporter = ErrorReporter(self.post_report, **(error_reporting or {}))
+        self.outbound = SendScheduler(self.post_message, retry_after=self.get_retry_after, **(outbound or {}))
+        # rate_limits=False turns invocation limiting off entirely.
+        self.rate_limiter = CommandRateLimiter(**(rate_limits or {})) if rate_limits is not False else None
 
     @classmethod
     def clone(cls, bot, **kwargs):
@@ -45,6 +144,7 @@ class ChatBot:
         kwargs.setdefault('group', bot.group)
         kwargs.setdefault('channels', bot.channels)
         kwargs.setdefault('report_channels', bot.report_channels)
+        kwargs.setdefault('http', bot.http)
         cloned_bot = cls(**kwargs)
         for cmd in bot.commands:
             cloned_bot.add_command(
@@ -54,80 +154,203 @@ class ChatBot:
                 override_group=True,
                 channels=cmd.channels,
                 override_channels=True,
+                cost=cmd.cost,
             )
         for signal in bot.signal_handlers:
-            for signal_handler in bot.signal_handlers[signal]:
-                cloned_bot.register_signal_handler(signal, signal_handler)
+            for priority, signal_handler in bot.signal_handlers[signal]:
+                cloned_bot.register_signal_handler(signal, signal_handler, priority=priority)
+        bot._followers.add(cloned_bot)
         return cloned_bot
 
+    # Shallow copy sharing the compiled command registry until either side modifies it.
+    def share(self, **attrs):
+        self._compile()
+        shared_bot = copy.copy(self)
+        shared_bot._followers = weakref.WeakSet()
+        shared_bot.__dict__.update(attrs)
+        self._registry_shared = shared_bot._registry_shared = True
+        self._followers.add(shared_bot)
+        return shared_bot
+
+    # Builds a complete command table and signal pipeline off to the side; register(staging) fills it.
+    def build_registry(self, register):
+        staging = copy.copy(self)
+        staging._commands = {}
+        staging._commands_meta = []
+        staging._signal_handler = {}
+        staging._signal_pipeline = {}
+        staging._registry_shared = False
+        staging._followers = weakref.WeakSet()
+        staging._invalidate_commands()
+        register(staging)
+        staging._compile()
+        return staging
+
+    # Swaps in another registry without awaiting, so no message observes a half-updated bot.
+    # Messages already past routing keep the command they resolved. Clones and shares follow.
+    def adopt_registry(self, source):
+        self._commands = source._commands
+        self._commands_meta = source._commands_meta
+        self._signal_handler = source._signal_handler
+        self._signal_pipeline = source._signal_pipeline
+        self._router = source._router if self._triggers == source._triggers else None
+        self._help_index = source._help_index
+        self._registry_shared = source._registry_shared = True
+        for follower in list(self._followers):
+            follower.adopt_registry(source)
+
+    def _own_registry(self):
+        if not self._registry_shared:
+            return
+        self._commands = dict(self._commands)
+        self._commands_meta = list(self._commands_meta)
+        self._signal_handler = {signal: list(handlers) for signal, handlers in self._signal_handler.items()}
+        self._signal_pipeline = dict(self._signal_pipeline)
+        self._registry_shared = False
+
     @property
     def platform(self):
         return self.PLATFORM
 
+    @property
+    def triggers(self):
+        return self._triggers
+
+    @triggers.setter
+    def triggers(self, triggers):
+        self._triggers = list(triggers)
+        self._router = None
+
+    @property
+    def router(self):
+        if self._router is None:
+            self._compile()
+        return self._router
+
+    @property
+    def help_index(self):
+        if self._help_index is None:
+            self._compile()
+        return self._help_index
+
+    # Builds the router and help index now instead of on first use, so copies share them.
+    def _compile(self):
+        if self._router is None:
+            self._router = CommandRouter(self._triggers, self._commands)
+        if self._help_index is None:
+            self._help_index = HelpIndex(self._commands_meta)
+
+    def _invalidate_commands(self):
+        self._router = None
+        self._help_index = None
+
     # noinspection PyBroadException
     async def handle_message(self, channel, user, text, **extra):
+        start = time.perf_counter()
+        command = ''
+        outcome = None
         try:
             payload = {
                 'channel': channel,
                 'user': user,
                 'text': text,
                 'bot': self,
+                'http': self.http,
                 'extra': extra,
             }
 
             await self.send_signal(self.PRE_MESSAGE_SIGNAL, payload)
 
-            for trigger in self.triggers:
-                if text.startswith(trigger):
-                    prefix = trigger
-                    break
-            else:
+            router = self.router
+            match = router.match(text)
+            if match is None:
                 return
+            await self.send_signal(self.TRIGGERED_SIGNAL, payload)
 
-            text = text[len(prefix):]
-            args = text.split()
-            if not args or not self.has_command(args[0]):
-                payload['reason'] = self.REASON_NOT_FOUND
+            prefix_end, alias = match
+            cmd = router.get(alias)
+            if cmd is None:
+                outcome = payload['reason'] = self.REASON_NOT_FOUND
                 await self.send_signal(self.INVALID_COMMAND_SIGNAL, payload)
                 return
-            cmd = self._commands[args[0]]
+            command = cmd.aliases[0]
 
             if cmd.group != '__all__' and user not in cmd.group:
-                payload['reason'] = self.REASON_NO_PERMISSION
+                outcome = payload['reason'] = self.REASON_NO_PERMISSION
                 await self.send_signal(self.INVALID_COMMAND_SIGNAL, payload)
                 return
             if cmd.channels != '__all__' and channel not in cmd.channels:
-                payload['reason'] = self.REASON_NO_PERMISSION
+                outcome = payload['reason'] = self.REASON_NO_PERMISSION
                 await self.send_signal(self.INVALID_COMMAND_SIGNAL, payload)
                 return
 
+            if self.rate_limiter is not None:
+                limited = self.rate_limiter.check(user, channel, command, cmd.cost)
+                if limited is not None:
+                    outcome = payload['reason'] = self.REASON_RATE_LIMITED
+                    payload['rate_limited'] = limited
+                    await self.send_signal(self.INVALID_COMMAND_SIGNAL, payload)
+                    return
+
+            if cmd.parser is None:
+                args = text[prefix_end:].split()
+            else:
+                try:
+                    args = cmd.parser(tokenize(text[prefix_end:]))
+                except ArgumentError as e:
+                    outcome = payload['reason'] = self.REASON_INVALID_ARGUMENT
+                    payload['error'] = str(e)
+                    await self.send_signal(self.INVALID_COMMAND_SIGNAL, payload)
+                    return
+
             payload['cmd'] = cmd
             await self.send_signal(self.PRE_COMMAND_SIGNAL, payload)
 
+            metrics.COMMANDS_IN_FLIGHT.inc(self.platform, command)
+            command_start = time.perf_counter()
             try:
                 res = await cmd(*args, **payload)
-            except TypeError as e:
-                payload['reason'] = self.REASON_INVALID_ARGUMENT
-                await self.send_signal(self.INVALID_COMMAND_SIGNAL, payload)
-                return
+            finally:
+                metrics.COMMANDS_IN_FLIGHT.dec(self.platform, command)
+                metrics.COMMAND_DURATION.observe(time.perf_counter() - command_start, self.platform, command)
+            outcome = 'ok'
             payload['result'] = res
             await self.send_signal(self.POST_COMMAND_SIGNAL, payload)
 
             return res
 
         except MessageHandleAborted as e:
-            self.logger.info('Message handling aborted with message: {}'.format(e))
+            self.logger.info('Message handling aborted with message: %s', str(e),
+                             extra=log_fields(self.platform, channel, user, command))
         except Exception:
-            error_log = traceback.format_exc()
-            self.logger.error(error_log)
-            if self.report_channels:
-                futures = [
-                    self.send_message(
-                        channel=report_channel,
-                        text='```{}```'.format(error_log)
-                    ) for report_channel in self.report_channels
-                ]
-                await asyncio.gather(*futures, return_exceptions=True)
+            outcome = 'error'
+            record = self.error_reporter.record(sys.exc_info(), channel=channel, user=user, text=text)
+            # The traceback is rendered by the log writer thread, not here.
+            self.logger.error('Command %s failed: %s', command, record.type, exc_info=True,
+                              extra=log_fields(self.platform, channel, user, command, fingerprint=record.fingerprint))
+            await self.error_reporter.report(record)
+        finally:
+            if outcome is not None:
+                duration = time.perf_counter() - start
+                metrics.MESSAGE_DURATION.observe(duration, self.platform)
+                metrics.COMMANDS.inc(self.platform, command, outcome)
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug('Handled %s', command, extra=log_fields(
+                        self.platform, channel, user, command, outcome=outcome, duration=round(duration, 6),
+                    ))
+
+    async def post_report(self, text):
+        if self.report_channels:
+            futures = [
+                self.send_message(
+                    channel=report_channel,
+                    text=text,
+                ) for report_channel in self.report_channels
+            ]
+            await asyncio.gather(*futures, return_exceptions=True)
+
+    def use_http(self, http):
+        self.http = http
 
     async def is_bot(self, user, **kwargs):
         return False
@@ -137,8 +360,19 @@ class ChatBot:
         return user
 
     async def send_message(self, channel, text, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await self.outbound.send(channel, text, **kwargs)
+        finally:
+            metrics.SEND_DURATION.observe(time.perf_counter() - start, self.platform)
+
+    async def post_message(self, channel, text, **kwargs):
         raise NotImplementedError
 
+    @staticmethod
+    def get_retry_after(error):
+        return None
+
     @property
     def commands(self):
         return self._commands_meta
@@ -153,29 +387,34 @@ class ChatBot:
 
     def add_command(self, cmd, aliases=None,
                     group='__all__', override_group=False,
-                    channels='__all__', override_channels=False):
+                    channels='__all__', override_channels=False, cost=1):
         aliases = aliases or [cmd.__name__]
         if not override_group and self.group != '__all__':
             if group == '__all__':
                 group = self.group
             else:
-                group = [username for username in group if username in self.group]
+                group = frozenset(group).intersection(self.group)
         if not override_channels and self.channels != '__all__':
             if channels == '__all__':
                 channels = self.channels
             else:
-                channels = [channel for channel in self.channels if channel in self.channels]
+                channels = frozenset(channels).intersection(self.channels)
         channels = channels or self.channels
         cmd.aliases = aliases
-        cmd.group = group
-        cmd.channels = channels
+        cmd.group = group if group == '__all__' else frozenset(group)
+        cmd.channels = channels if channels == '__all__' else frozenset(channels)
+        cmd.cost = cost
+        if not isinstance(cmd, LazyCommand):
+            cmd.parser = compile_parser(cmd)
+        self._own_registry()
         for alias in aliases:
             self._commands[alias] = cmd
         self._commands_meta.append(cmd)
+        self._invalidate_commands()
 
     def command(self, aliases=None,
                 group='__all__', override_group=False,
-                channels='__all__', override_channels=False):
+                channels='__all__', override_channels=False, cost=1):
         def decorator(f):
             self.add_command(
                 f,
@@ -184,6 +423,7 @@ class ChatBot:
                 override_group=override_group,
                 channels=channels,
                 override_channels=override_channels,
+                cost=cost,
             )
             return f
         return decorator
@@ -193,16 +433,35 @@ class ChatBot:
         return self._signal_handler
 
     async def send_signal(self, signal, payload):
-        if signal in self._signal_handler:
-            signal_futures = [f(**payload) for f in self._signal_handler[signal]]
-            await asyncio.gather(*signal_futures)
-
-    def register_signal_handler(self, signal, f):
-        self._signal_handler.setdefault(signal, []).append(f)
+        pipeline = self._signal_pipeline.get(signal)
+        if not pipeline:
+            return
+        start = time.perf_counter()
+        try:
+            for handlers in pipeline:
+                if len(handlers) == 1:
+                    await handlers[0](**payload)
+                else:
+                    await asyncio.gather(*[f(**payload) for f in handlers])
+        finally:
+            metrics.SIGNAL_DURATION.observe(time.perf_counter() - start, self.platform, signal)
+
+    def register_signal_handler(self, signal, f, priority=0):
+        self._own_registry()
+        handlers = self._signal_handler.setdefault(signal, [])
+        handlers.append((priority, f))
+        handlers.sort(key=lambda handler: handler[0])
+        pipeline = []
+        for handler_priority, handler in handlers:
+            if pipeline and pipeline[-1][0] == handler_priority:
+                pipeline[-1][1].append(handler)
+            else:
+                pipeline.append((handler_priority, [handler]))
+        self._signal_pipeline[signal] = tuple(tuple(stage) for _, stage in pipeline)
 
-    def on_signal(self, signal):
+    def on_signal(self, signal, priority=0):
         def decorator(f):
-            self.register_signal_handler(signal, f)
+            self.register_signal_handler(signal, f, priority=priority)
             return f
         return decorator
 
@@ -210,11 +469,29 @@ class ChatBot:
 class SlackBot(ChatBot):
     PLATFORM = 'Slack'
 
-    def __init__(self, token, *args, **kwargs):
+    def __init__(self, token, *args, user_cache_size=4096, user_cache_ttl=600, user_error_ttl=60, **kwargs):
         super(SlackBot, self).__init__(*args, **kwargs)
         self._token = token
-        self.client = slack.WebClient(token=token, run_async=True)
+        self._client = None
         self._bot_user_id = None
+        self.user_cache = TTLCache(maxsize=user_cache_size, ttl=user_cache_ttl, error_ttl=user_error_ttl)
+
+    @property
+    def client(self):
+        # The Slack SDK is only imported once a Slack bot actually talks to the API.
+        if self._client is None:
+            import slack
+
+            self._client = slack.WebClient(token=self._token, run_async=True)
+        return self._client
+
+    # Bot for another workspace sharing commands, HTTP session and user cache with this one.
+    def tenant(self, token):
+        client = copy.copy(self.client)
+        client.token = token
+        tenant_bot = self.share(_token=token, _client=client, _bot_user_id=None)
+        tenant_bot.outbound = self.outbound.copy(tenant_bot.post_message)
+        return tenant_bot
 
     async def message_handler(self, payload):
         try:
@@ -231,34 +508,99 @@ class SlackBot(ChatBot):
             self._bot_user_id = (await self.client.auth_test())['user_id']
         return self._bot_user_id
 
-    async def is_bot(self, user, **_):
-        user_info = (await self.client.users_info(user=user))['user']
-        return user_info['is_bot']
+    def use_http(self, http):
+        super(SlackBot, self).use_http(http)
+        self.client.session = http.session
+
+    async def get_user_info(self, user):
+        async def fetch():
+            return (await self.client.users_info(user=user))['user']
+        return await self.user_cache.get_or_fetch(user, fetch)
+
+    async def warm_user_cache(self, limit=200):
+        cursor = None
+        while True:
+            kwargs = {'limit': limit}
+            if cursor:
+                kwargs['cursor'] = cursor
+            response = await self.client.users_list(**kwargs)
+            for user_info in response['members']:
+                self.user_cache.set(user_info['id'], user_info)
+            cursor = (response.get('response_metadata') or {}).get('next_cursor')
+            if not cursor:
+                break
+
+    async def is_bot(self, user, event=None, **_):
+        if event is not None and ('bot_id' in event or event.get('subtype') == 'bot_message'):
+            return True
+        return (await self.get_user_info(user))['is_bot']
 
     @staticmethod
     def mention(user):
         return '<@{}>'.format(user)
 
-    async def send_message(self, channel, text, **_):
+    async def post_message(self, channel, text, **_):
         await self.client.chat_postMessage(channel=channel, text=text, as_user=True)
 
+    @staticmethod
+    def get_retry_after(error):
+        from slack.errors import SlackApiError
+
+        if isinstance(error, SlackApiError) and error.response.status_code == 429:
+            return float(error.response.headers.get('Retry-After', 1))
+        return None
+
 
 class DiscordBot(ChatBot):
     PLATFORM = 'Discord'
 
-    def __init__(self, token, *args, **kwargs):
+    def __init__(self, token, *args, lean=True, intents=None, max_messages=None,
+                 member_cache_flags=None, **kwargs):
+        import discord
+
         super(DiscordBot, self).__init__(*args, **kwargs)
         self._token = token
-        self.client = discord.Client()
+        self.client = discord.Client(**self.client_options(
+            lean,
+            intents=intents,
+            max_messages=max_messages,
+            member_cache_flags=member_cache_flags,
+        ))
         self.client.event(self.on_message)
 
+    @staticmethod
+    def lean_intents():
+        import discord
+
+        # Guild messages and DMs for commands, members for on_member_join, guilds for channel lookups.
+        return discord.Intents(guilds=True, members=True, guild_messages=True, dm_messages=True)
+
+    @classmethod
+    def client_options(cls, lean=True, intents=None, max_messages=None, member_cache_flags=None):
+        import discord
+
+        if not hasattr(discord, 'Intents'):
+            # discord.py before 1.5 (the version in poetry.lock) has no intents or member cache flags;
+            # only the message cache can be turned off there.
+            return {'max_messages': max_messages} if lean or max_messages is not None else {}
+        if not lean:
+            options = {'intents': intents, 'max_messages': max_messages, 'member_cache_flags': member_cache_flags}
+            return {key: value for key, value in options.items() if value is not None}
+        return {
+            'intents': intents or cls.lean_intents(),
+            'max_messages': max_messages,
+            'member_cache_flags': member_cache_flags or discord.MemberCacheFlags.none(),
+            'chunk_guilds_at_startup': False,
+        }
+
     async def on_message(self, message):
-        user = message.author
         text = message.content
-        channel = message.channel
-        return await self.handle_message(channel, user, text)
+        # Without pre_message handlers nothing is interested in untriggered messages.
+        if self.PRE_MESSAGE_SIGNAL not in self._signal_pipeline and self.router.match_trigger(text) is None:
+            return
+        return await self.handle_message(message.channel, message.author, text)
 
-    async def send_message(self, channel, text, **_):
+    async def post_message(self, channel, text, **_):
         return await channel.send(text)
 
     async def start(self):
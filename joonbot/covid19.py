@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import re
+import time
+from collections import namedtuple
+
+
+CountryStat = namedtuple('CountryStat', ['country_name', 'cases', 'deaths', 'total_recovered'])
+
+DEFAULT_ALIASES = {
+    'korea': 'S. Korea',
+    'south korea': 'S. Korea',
+    'republic of korea': 'S. Korea',
+    '한국': 'S. Korea',
+    '대한민국': 'S. Korea',
+    '남한': 'S. Korea',
+    'us': 'USA',
+    'united states': 'USA',
+    'america': 'USA',
+    '미국': 'USA',
+    'united kingdom': 'UK',
+    'britain': 'UK',
+    '영국': 'UK',
+    '중국': 'China',
+    '일본': 'Japan',
+    '이탈리아': 'Italy',
+    '스페인': 'Spain',
+    '독일': 'Germany',
+    '프랑스': 'France',
+    '이란': 'Iran',
+}
+
+
+def normalize_country(name):
+    return re.sub(r'\s+', ' ', name).strip().casefold()
+
+
+def parse_count(value):
+    try:
+        return int(str(value).replace(',', ''))
+    except ValueError:
+        return None
+
+
+def format_count(value):
+    return 'N/A' if value is None else '{:,}'.format(value)
+
+
+class Covid19Snapshot:
+    def __init__(self, countries_stat, aliases=None):
+        stats = [
+            CountryStat(
+                country_name=stat['country_name'],
+                cases=parse_count(stat['cases']),
+                deaths=parse_count(stat['deaths']),
+                total_recovered=parse_count(stat['total_recovered']),
+            ) for stat in countries_stat
+        ]
+        stats.sort(key=lambda stat: stat.cases or 0, reverse=True)
+        self.stats = stats
+        self.lines = [
+            '{}: {} / {} / {}'.format(
+                stat.country_name,
+                format_count(stat.cases),
+                format_count(stat.deaths),
+                format_count(stat.total_recovered),
+            ) for stat in stats
+        ]
+        self.index = {}
+        for stat in stats:
+            self.index.setdefault(normalize_country(stat.country_name), stat)
+        for alias, country_name in (aliases or {}).items():
+            stat = self.index.get(normalize_country(country_name))
+            if stat is not None:
+                self.index.setdefault(normalize_country(alias), stat)
+
+    def __len__(self):
+        return len(self.stats)
+
+    def find(self, country):
+        return self.index.get(normalize_country(country))
+
+    def page(self, page, pagination=20):
+        num_pages = max((len(self.stats) - 1) // pagination + 1, 1)
+        page = min(max(page, 1), num_pages)
+        start = pagination * (page - 1)
+        return page, num_pages, self.lines[start:start + pagination]
+
+
+class Covid19Dataset:
+    def __init__(self, fetch, refresh_interval=300, aliases=None, logger=None, clock=time.monotonic):
+        self._fetch = fetch
+        self._clock = clock
+        self.refresh_interval = refresh_interval
+        self.aliases = DEFAULT_ALIASES if aliases is None else aliases
+        self.logger = logger or logging.getLogger(__name__)
+        self.snapshot = None
+        self._refreshed_at = None
+        self._refreshing = None
+        self._task = None
+
+    async def refresh(self):
+        if self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self._refresh())
+        return await asyncio.shield(self._refreshing)
+
+    async def _refresh(self):
+        try:
+            resp_json = await self._fetch()
+            self.snapshot = Covid19Snapshot(resp_json['countries_stat'], aliases=self.aliases)
+            self._refreshed_at = self._clock()
+            return self.snapshot
+        finally:
+            self._refreshing = None
+
+    async def get(self):
+        if self.snapshot is None:
+            return await self.refresh()
+        # Processes without the periodic task (workers other than the first) refresh on use.
+        if self._task is None and self._refreshing is None \
+                and self._clock() - self._refreshed_at >= self.refresh_interval:
+            self._refreshing = asyncio.ensure_future(self._refresh_quietly())
+        return self.snapshot
+
+    # noinspection PyBroadException
+    async def _refresh_quietly(self):
+        try:
+            await self._refresh()
+        except Exception:
+            self.logger.exception('Failed to refresh COVID-19 dataset.')
+        return self.snapshot
+
+    # noinspection PyBroadException
+    async def _refresh_periodically(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.logger.exception('Failed to refresh COVID-19 dataset.')
+            await asyncio.sleep(self.refresh_interval)
+
+    async def start(self, _=None):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._refresh_periodically())
+
+    async def close(self, _=None):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,201 @@
+import asyncio
+import concurrent.futures
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+
+
+class EventDeduplicator:
+    blocking = False
+
+    def __init__(self, window=600, maxsize=10000, clock=time.monotonic):
+        self.window = window
+        self.maxsize = maxsize
+        self.duplicates = 0
+        self._clock = clock
+        self._seen = OrderedDict()
+
+    def __len__(self):
+        return len(self._seen)
+
+    def _evict(self, now):
+        while self._seen:
+            event_id, seen_at = next(iter(self._seen.items()))
+            if seen_at + self.window > now and len(self._seen) <= self.maxsize:
+                break
+            del self._seen[event_id]
+
+    def is_duplicate(self, event_id):
+        if event_id is None:
+            return False
+        now = self._clock()
+        self._evict(now)
+        if event_id in self._seen:
+            self.duplicates += 1
+            return True
+        self._seen[event_id] = now
+        if len(self._seen) > self.maxsize:
+            self._seen.popitem(last=False)
+        return False
+
+
+class SqliteEventDeduplicator:
+    # Touches the disk and may wait on other workers' locks, so callers check it off the event loop
+    # through is_duplicate_async.
+    blocking = True
+
+    def __init__(self, path, window=600, maxsize=10000, prune_every=100, busy_timeout=0.5, clock=time.time):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.window = window
+        self.maxsize = maxsize
+        self.prune_every = prune_every
+        self.duplicates = 0
+        self._clock = clock
+        self._inserts = 0
+        self._db = None
+        self._executor = None
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = sqlite3.connect(
+                self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False,
+            )
+            self._db.execute('PRAGMA journal_mode=WAL')
+            # WAL stays consistent without an fsync per commit; a crash only loses the newest event ids.
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute('CREATE TABLE IF NOT EXISTS events (event_id TEXT PRIMARY KEY, seen_at REAL NOT NULL)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS events_seen_at ON events (seen_at)')
+        return self._db
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+
+    def _prune(self, now):
+        self.db.execute('DELETE FROM events WHERE seen_at <= ?', (now - self.window,))
+        self.db.execute(
+            'DELETE FROM events WHERE event_id IN '
+            '(SELECT event_id FROM events ORDER BY seen_at DESC LIMIT -1 OFFSET ?)',
+            (self.maxsize,),
+        )
+
+    def is_duplicate(self, event_id):
+        if event_id is None:
+            return False
+        now = self._clock()
+        if self.db.execute('INSERT OR IGNORE INTO events VALUES (?, ?)', (event_id, now)).rowcount:
+            self._inserts += 1
+            if self._inserts % self.prune_every == 0:
+                self._prune(now)
+            return False
+        row = self.db.execute('SELECT seen_at FROM events WHERE event_id = ?', (event_id,)).fetchone()
+        if row is not None and row[0] + self.window > now:
+            self.duplicates += 1
+            return True
+        self.db.execute('UPDATE events SET seen_at = ? WHERE event_id = ?', (now, event_id))
+        return False
+
+    async def is_duplicate_async(self, event_id):
+        # A single thread keeps the connection used serially.
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        return await asyncio.get_event_loop().run_in_executor(self._executor, self.is_duplicate, event_id)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class EventDispatcher:
+    def __init__(self, workers=8, high_water_mark=1000, ordered=False, logger=None, clock=time.monotonic):
+        self.workers = workers
+        self.high_water_mark = high_water_mark
+        self.ordered = ordered
+        self.logger = logger or logging.getLogger(__name__)
+        self._clock = clock
+        self._queues = []
+        self._tasks = []
+        self._closing = False
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+        self.shed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def started(self):
+        return bool(self._tasks)
+
+    @property
+    def depth(self):
+        return sum(queue.qsize() for queue in self._queues)
+
+    @property
+    def mean_wait(self):
+        return self.total_wait / self.processed if self.processed else 0.0
+
+    def start(self):
+        if self.started:
+            return
+        self._closing = False
+        num_queues = self.workers if self.ordered else 1
+        self._queues = [asyncio.Queue() for _ in range(num_queues)]
+        self._tasks = [
+            asyncio.ensure_future(self._work(self._queues[i % num_queues]))
+            for i in range(self.workers)
+        ]
+
+    def submit(self, handler, data, key=None):
+        if self._closing:
+            self.shed += 1
+            return False
+        if not self.started:
+            self.start()
+        if self.depth >= self.high_water_mark:
+            self.shed += 1
+            return False
+        if self.ordered and key is not None:
+            queue = self._queues[hash(key) % len(self._queues)]
+        else:
+            queue = min(self._queues, key=lambda q: q.qsize())
+        queue.put_nowait((self._clock(), handler, data))
+        return True
+
+    # noinspection PyBroadException
+    async def _work(self, queue):
+        while True:
+            enqueued_at, handler, data = await queue.get()
+            wait = self._clock() - enqueued_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.in_flight += 1
+            try:
+                await handler(data)
+            except Exception:
+                self.failed += 1
+                self.logger.exception('Event handler {} failed.'.format(handler))
+            finally:
+                self.in_flight -= 1
+                self.processed += 1
+                queue.task_done()
+
+    async def close(self, timeout=30):
+        if not self.started:
+            return
+        self._closing = True
+        try:
+            await asyncio.wait_for(asyncio.gather(*[queue.join() for queue in self._queues]), timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning('Dropping {} events still queued on shutdown.'.format(self.depth))
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = []
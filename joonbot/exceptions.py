@@ -4,3 +4,7 @@ class MessageHandleAborted(Exception):
 
 class CommandNotFound(Exception):
     pass
+
+
+class ArgumentError(ValueError):
+    pass
@@ -0,0 +1,38 @@
+class HttpClient:
+    def __init__(self, limit=100, limit_per_host=20, dns_cache_ttl=300, keepalive_timeout=30, timeout=10):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def start(self, _=None):
+        return self.session
+
+    async def close(self, _=None):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get_json(self, url, **kwargs):
+        async with self.session.get(url, **kwargs) as resp:
+            return await resp.json(content_type=None)
@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import resource
+import time
+
+import aiohttp
+from aiohttp import web
+
+
+COMMANDS = [
+    'joonbot echo hello',
+    'joonbot help',
+    'joonbot dust 강남구',
+    'joonbot covid19 2',
+    'joonbot covid19 한국',
+    '준봇 hi',
+    'joonbot version',
+    'joonbot nothing',
+]
+
+USERS = ['ULOAD{:04d}'.format(i) for i in range(50)]
+
+
+class StubServer:
+    """Stands in for the Slack Web API, AirKorea and RapidAPI."""
+
+    def __init__(self):
+        self.replies = {}
+        self.calls = {}
+        self._runner = None
+        self.url = None
+
+    async def slack_api(self, request):
+        method = request.match_info['method']
+        self.calls[method] = self.calls.get(method, 0) + 1
+        params = dict(request.query)
+        if request.can_read_body:
+            if request.content_type == 'application/json':
+                params.update(await request.json())
+            else:
+                params.update(await request.post())
+        if method == 'chat.postMessage':
+            self.replies.setdefault(params.get('channel'), time.perf_counter())
+            return web.json_response({'ok': True, 'channel': params.get('channel'), 'ts': '0.0'})
+        if method == 'users.info':
+            return web.json_response({'ok': True, 'user': {'id': params.get('user'), 'is_bot': False}})
+        if method == 'users.list':
+            return web.json_response({'ok': True, 'members': [
+                {'id': user, 'is_bot': False} for user in USERS
+            ], 'response_metadata': {'next_cursor': ''}})
+        if method == 'auth.test':
+            return web.json_response({'ok': True, 'user_id': 'ULOADBOT'})
+        return web.json_response({'ok': True})
+
+    @staticmethod
+    async def airkorea(request):
+        return web.json_response({'list': [{
+            'dataTime': '2020-04-01 12:00',
+            'pm10Value': '42',
+            'pm10Grade1h': '2',
+            'pm25Value': '21',
+            'pm25Grade1h': '2',
+        }]})
+
+    @staticmethod
+    async def covid19(request):
+        return web.json_response({'countries_stat': [
+            {
+                'country_name': 'Country {}'.format(i) if i else 'S. Korea',
+                'cases': '{:,}'.format(100000 - i * 100),
+                'deaths': '{:,}'.format(1000 - i),
+                'total_recovered': '{:,}'.format(50000 - i * 10),
+            } for i in range(200)
+        ]})
+
+    async def start(self):
+        stub_app = web.Application()
+        stub_app.add_routes([
+            web.route('*', '/api/{method}', self.slack_api),
+            web.get('/airkorea', self.airkorea),
+            web.get('/covid19', self.covid19),
+        ])
+        self._runner = web.AppRunner(stub_app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        self.url = 'http://127.0.0.1:{}'.format(site._server.sockets[0].getsockname()[1])
+        return self.url
+
+    async def close(self):
+        await self._runner.cleanup()
+
+
+def synthetic_corpus(events, command_ratio=0.3, seed=0):
+    rng = random.Random(seed)
+    for i in range(events):
+        if rng.random() < command_ratio:
+            text = COMMANDS[rng.randrange(len(COMMANDS))]
+        else:
+            text = 'ordinary chatter number {} in a busy channel'.format(i)
+        yield {
+            'token': 'loadtest',
+            'team_id': 'TLOAD',
+            'type': 'event_callback',
+            'event': {
+                'type': 'message',
+                'user': rng.choice(USERS),
+                'text': text,
+                'ts': '{}.{:06d}'.format(int(time.time()), i),
+            },
+        }
+
+
+def recorded_corpus(path, events):
+    with open(path) as corpus_file:
+        payloads = [json.loads(line) for line in corpus_file if line.strip()]
+    for i in range(events):
+        yield payloads[i % len(payloads)]
+
+
+def sign(secret, body):
+    timestamp = str(int(time.time()))
+    basestring = b'v0:' + timestamp.encode() + b':' + body
+    return {
+        'Content-Type': 'application/json',
+        'X-Slack-Request-Timestamp': timestamp,
+        'X-Slack-Signature': 'v0=' + hmac.new(secret.encode(), basestring, hashlib.sha256).hexdigest(),
+    }
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+async def run(events=2000, concurrency=50, corpus=None, command_ratio=0.3, settle=2.0):
+    stub = StubServer()
+    stub_url = await stub.start()
+    os.environ.setdefault('SLACK_SIGNING_SECRET', 'loadtest-signing-secret')
+    os.environ.setdefault('OPENAPI_SERVICE_KEY', 'loadtest')
+    os.environ.setdefault('RAPIDAPI_KEY', 'loadtest')
+    os.environ['AIRKOREA_API_URL'] = stub_url + '/airkorea'
+    os.environ['RAPIDAPI_COVID19_URL'] = stub_url + '/covid19'
+    secret = os.environ['SLACK_SIGNING_SECRET']
+
+    from .app import create_app, joonbot, slack_event_handler
+    from .outbound import SendScheduler
+
+    joonbot.client.base_url = stub_url + '/api/'
+    joonbot.outbound = SendScheduler(
+        joonbot.post_message, channel_rate=None, global_rate=None, retry_after=joonbot.get_retry_after,
+    )
+    # A few dozen synthetic users would otherwise spend most of the run rate limited.
+    joonbot.rate_limiter = None
+
+    runner = web.AppRunner(create_app(discord=False, scheduler=False))
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    events_url = 'http://127.0.0.1:{}/slack/events'.format(site._server.sockets[0].getsockname()[1])
+
+    if corpus:
+        payloads = list(recorded_corpus(corpus, events))
+    else:
+        payloads = list(synthetic_corpus(events, command_ratio))
+
+    sent_at = {}
+    ack_latencies = []
+    statuses = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def post(session, i, payload):
+        payload = dict(payload, event_id='EvLOAD{:08d}'.format(i))
+        payload['event'] = dict(payload['event'], channel='CLOAD{:08d}'.format(i))
+        body = json.dumps(payload).encode()
+        async with semaphore:
+            start = sent_at[payload['event']['channel']] = time.perf_counter()
+            async with session.post(events_url, data=body, headers=sign(secret, body)) as resp:
+                await resp.read()
+                statuses[resp.status] = statuses.get(resp.status, 0) + 1
+            ack_latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*[post(session, i, payload) for i, payload in enumerate(payloads)])
+        acked = time.perf_counter() - start
+
+        replies = -1
+        while replies != len(stub.replies):
+            replies = len(stub.replies)
+            await asyncio.sleep(settle)
+        elapsed = max(stub.replies.values(), default=start + acked) - start
+
+    await runner.cleanup()
+    await stub.close()
+
+    dispatcher = slack_event_handler.dispatcher
+    reply_latencies = [stub.replies[channel] - sent_at[channel] for channel in sent_at if channel in stub.replies]
+    return {
+        'events': len(payloads),
+        'concurrency': concurrency,
+        'statuses': statuses,
+        'ack_throughput': len(payloads) / acked,
+        'ack_latency': [percentile(ack_latencies, q) for q in (50, 95, 99)],
+        'replies': len(reply_latencies),
+        'reply_throughput': len(reply_latencies) / elapsed if elapsed > 0 else 0,
+        'reply_latency': [percentile(reply_latencies, q) for q in (50, 95, 99)],
+        'dispatched': dispatcher.processed,
+        'shed': dispatcher.shed,
+        'failed': dispatcher.failed,
+        'errors': joonbot.error_reporter.reported + joonbot.error_reporter.aggregated,
+        'stub_calls': stub.calls,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def format_report(report):
+    lines = [
+        'events: {events} at concurrency {concurrency} (HTTP statuses: {statuses})'.format(**report),
+        'ack:    {:.0f} events/sec, p50/p95/p99 {} ms'.format(
+            report['ack_throughput'], ' / '.join('{:.1f}'.format(v * 1000) for v in report['ack_latency'])),
+        'reply:  {} replies, {:.0f} replies/sec, p50/p95/p99 {} ms'.format(
+            report['replies'], report['reply_throughput'],
+            ' / '.join('{:.1f}'.format(v * 1000) for v in report['reply_latency'])),
+        'dispatch: {dispatched} handled, {shed} shed, {failed} failed, {errors} command errors'.format(**report),
+        'stub API calls: {}'.format(report['stub_calls']),
+        'peak RSS: {:.1f} MB'.format(report['peak_rss_mb']),
+    ]
+    return '\n'.join(lines)
+
+
+def add_arguments(parser):
+    parser.add_argument('--events', type=int, default=2000, help='number of events to replay')
+    parser.add_argument('--concurrency', type=int, default=50, help='concurrent in-flight requests')
+    parser.add_argument('--corpus', help='JSONL file of recorded event_callback payloads')
+    parser.add_argument('--command-ratio', type=float, default=0.3,
+                        help='share of synthetic messages that are commands')
+
+
+def main(args):
+    loop = asyncio.get_event_loop()
+    report = loop.run_until_complete(run(
+        events=args.events,
+        concurrency=args.concurrency,
+        corpus=args.corpus,
+        command_ratio=args.command_ratio,
+    ))
+    print(format_report(report))
@@ -0,0 +1,148 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+# Structured fields copied from ``extra=`` into every JSON record that carries them.
+FIELDS = ('platform', 'channel', 'user', 'command', 'outcome', 'duration', 'fingerprint',
+          'event_type', 'event_id', 'team', 'sample_rate')
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['traceback'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['traceback'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def stream_handler(fmt='json', stream=None):
+    handler = logging.StreamHandler(stream or sys.stderr)
+    if fmt == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    return handler
+
+
+class SamplingFilter(logging.Filter):
+    # Keeps one in ``every`` records per message template at or below ``level``; the kept ones
+    # carry ``sample_rate`` so counts can be scaled back up.
+    def __init__(self, every=100, level=logging.DEBUG):
+        super().__init__()
+        self.every = every
+        self.level = level
+        self._counts = {}
+        self.sampled_out = 0
+
+    def filter(self, record):
+        if record.levelno > self.level or self.every <= 1:
+            return True
+        key = (record.name, record.msg)
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        if count % self.every:
+            self.sampled_out += 1
+            return False
+        record.sample_rate = self.every
+        return True
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    # Unlike the stdlib handler this neither formats the message nor the traceback on the calling
+    # thread, and drops records instead of blocking when the writer falls behind. Arguments are
+    # therefore rendered later: log ids and strings, not objects that keep changing.
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    # Waits for room rather than failing to stop when the queue is full.
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    def __init__(self, level=logging.INFO, fmt='json', sample_every=100, maxsize=10000,
+                 stream=None, logger=None):
+        self.level = level
+        self.logger = logger or logging.getLogger()
+        self.queue = queue.Queue(maxsize)
+        self.handler = QueueHandler(self.queue)
+        self.sampler = SamplingFilter(sample_every)
+        self.handler.addFilter(self.sampler)
+        self._listener = _QueueListener(self.queue, stream_handler(fmt, stream))
+        self._started = False
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        kwargs.setdefault('level', os.getenv('JOONBOT_LOG_LEVEL', 'INFO').upper())
+        kwargs.setdefault('fmt', os.getenv('JOONBOT_LOG_FORMAT', 'json'))
+        kwargs.setdefault('sample_every', int(os.getenv('JOONBOT_LOG_SAMPLE', 100)))
+        return cls(**kwargs)
+
+    @property
+    def depth(self):
+        return self.queue.qsize()
+
+    @property
+    def dropped(self):
+        return self.handler.dropped
+
+    # Started per process (after any fork), since the writer thread does not survive fork().
+    async def start(self, _=None):
+        if self._started:
+            return
+        self._started = True
+        self._listener.start()
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(self.level)
+
+    # Writes out everything still queued before returning.
+    async def close(self, _=None):
+        if not self._started:
+            return
+        self._started = False
+        self.logger.removeHandler(self.handler)
+        self._listener.stop()
+
+    def collect_metrics(self):
+        return [
+            ('joonbot_log_queue_depth', 'gauge', 'Log records waiting for the writer thread.',
+             [({}, self.depth)]),
+            ('joonbot_log_records_dropped_total', 'counter', 'Log records dropped by result.',
+             [({'result': 'queue_full'}, self.dropped),
+              ({'result': 'sampled_out'}, self.sampler.sampled_out)]),
+        ]
+
+
+def log_fields(platform, channel=None, user=None, command=None, **fields):
+    # Discord passes channel and member objects; only their ids cross to the writer thread.
+    fields['platform'] = platform
+    fields['channel'] = getattr(channel, 'id', channel)
+    fields['user'] = getattr(user, 'id', user)
+    fields['command'] = command or None
+    return fields
@@ -0,0 +1,145 @@
+from bisect import bisect_left
+
+
+def _format_labels(labelnames, labels):
+    if not labelnames:
+        return ''
+    return '{{{}}}'.format(','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in zip(labelnames, labels)
+    ))
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class Metric:
+    TYPE = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield self.name, self.labelnames, labels, value
+
+
+class Counter(Metric):
+    TYPE = 'counter'
+
+    def inc(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+
+class Gauge(Counter):
+    TYPE = 'gauge'
+
+    def dec(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, value, *labels):
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    TYPE = 'histogram'
+    DEFAULT_BUCKETS = (.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super(Histogram, self).__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def count(self, *labels):
+        state = self._values.get(labels)
+        return sum(state[0]) if state else 0
+
+    def samples(self):
+        labelnames = self.labelnames + ('le',)
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield self.name + '_bucket', labelnames, labels + (_format_value(bound),), cumulative
+            yield self.name + '_sum', self.labelnames, labels, total
+            yield self.name + '_count', self.labelnames, labels, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        if name not in self._metrics:
+            self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+        return self._metrics[name]
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), **kwargs):
+        return self._get_or_create(Histogram, name, documentation, labelnames, **kwargs)
+
+    def register_collector(self, collector):
+        self._collectors.append(collector)
+
+    def collect(self):
+        for metric in self._metrics.values():
+            yield metric.name, metric.TYPE, metric.documentation, metric.samples()
+        for collector in self._collectors:
+            for name, metric_type, documentation, values in collector():
+                labelnames = tuple(sorted({key for labels, _ in values for key in labels}))
+                yield name, metric_type, documentation, (
+                    (name, labelnames, tuple(labels.get(key, '') for key in labelnames), value)
+                    for labels, value in values
+                )
+
+    def render(self):
+        lines = []
+        for name, metric_type, documentation, samples in self.collect():
+            lines.append('# HELP {} {}'.format(name, documentation))
+            lines.append('# TYPE {} {}'.format(name, metric_type))
+            for sample_name, labelnames, labels, value in samples:
+                lines.append('{}{} {}'.format(sample_name, _format_labels(labelnames, labels), _format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+MESSAGE_DURATION = registry.histogram(
+    'joonbot_message_duration_seconds', 'Time spent handling a triggered chat message.', ['platform'])
+COMMANDS = registry.counter(
+    'joonbot_commands_total', 'Triggered messages by command and outcome.', ['platform', 'command', 'outcome'])
+COMMAND_DURATION = registry.histogram(
+    'joonbot_command_duration_seconds', 'Time spent running a command.', ['platform', 'command'])
+COMMANDS_IN_FLIGHT = registry.gauge(
+    'joonbot_commands_in_flight', 'Commands currently running.', ['platform', 'command'])
+SIGNAL_DURATION = registry.histogram(
+    'joonbot_signal_duration_seconds', 'Time spent running signal handlers.', ['platform', 'signal'])
+SEND_DURATION = registry.histogram(
+    'joonbot_send_duration_seconds', 'Time from queueing a message until it is posted.', ['platform'])
+SLACK_EVENTS = registry.counter(
+    'joonbot_slack_events_total', 'Slack event requests by type.', ['type'])
+SLACK_EVENT_DURATION = registry.histogram(
+    'joonbot_slack_event_duration_seconds', 'Time spent acknowledging a Slack event request.')
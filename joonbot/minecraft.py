@@ -0,0 +1,75 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import TTLCache
+
+
+def query_server(address, method):
+    from mcstatus import MinecraftServer
+
+    server = MinecraftServer.lookup(address)
+    if method == 'status':
+        result = server.status()
+    elif method == 'ping':
+        result = server.ping()
+    else:
+        result = server.query()
+    return server.host, server.port, result
+
+
+class MinecraftStatusClient:
+    def __init__(self, max_workers=8, timeout=5, per_host_limit=2, cache_ttl=10, error_ttl=5, query=query_server):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.per_host_limit = per_host_limit
+        self.cache = TTLCache(maxsize=256, ttl=cache_ttl, error_ttl=error_ttl)
+        self._query = query
+        self._executor = None
+        self._semaphores = {}
+        self._users = {}
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def fetch(self, address, method):
+        return await self.cache.get_or_fetch((address, method), lambda: self._fetch(address, method))
+
+    async def _fetch(self, address, method):
+        return await asyncio.wait_for(self._fetch_limited(address, method), self.timeout)
+
+    async def _fetch_limited(self, address, method):
+        host = address.rsplit(':', 1)[0].lower()
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+            self._users[host] = 0
+        self._users[host] += 1
+        try:
+            await self._semaphores[host].acquire()
+        except asyncio.CancelledError:
+            self._leave(host)
+            raise
+
+        # The slot is released when the worker thread finishes, not when the caller gives up,
+        # so a hanging server can never hold more than per_host_limit threads.
+        loop = asyncio.get_event_loop()
+        future = self.executor.submit(self._query, address, method)
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release, host))
+        return await asyncio.wrap_future(future)
+
+    def _release(self, host):
+        self._semaphores[host].release()
+        self._leave(host)
+
+    def _leave(self, host):
+        self._users[host] -= 1
+        if not self._users[host]:
+            del self._users[host]
+            del self._semaphores[host]
+
+    async def close(self, _=None):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,173 @@
+import asyncio
+import time
+from collections import deque
+
+from .ratelimit import KeyedBuckets, TokenBucket
+
+
+class _PendingMessage:
+    __slots__ = ('text', 'kwargs', 'future', 'enqueued_at')
+
+    def __init__(self, text, kwargs, future, enqueued_at):
+        self.text = text
+        self.kwargs = kwargs
+        self.future = future
+        self.enqueued_at = enqueued_at
+
+
+class SendScheduler:
+    def __init__(self, send,
+                 channel_rate=1, channel_burst=5,
+                 global_rate=20, global_burst=20,
+                 coalesce=False, coalesce_limit=3000, coalesce_separator='\n',
+                 retry_after=None, channel_buckets=4096, clock=time.monotonic):
+        self._send = send
+        self._retry_after = retry_after or (lambda error: None)
+        self._clock = clock
+        self.channel_rate = channel_rate
+        self.channel_burst = channel_burst
+        self.channel_buckets = channel_buckets
+        self.coalesce = coalesce
+        self.coalesce_limit = coalesce_limit
+        self.coalesce_separator = coalesce_separator
+        self._global_bucket = TokenBucket(global_rate, global_burst, clock=clock) if global_rate else None
+        self._channel_buckets = None
+        self._reset_channel_buckets()
+        self._queues = {}
+        self._workers = {}
+        self._paused_until = 0
+        self.sent = 0
+        self.posts = 0
+        self.rate_limited = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    # Least recently posted channels are forgotten past channel_buckets; they start over with a full burst.
+    def _reset_channel_buckets(self):
+        if self.channel_rate:
+            self._channel_buckets = KeyedBuckets(
+                self.channel_rate, self.channel_burst, self.channel_buckets, clock=self._clock,
+            )
+
+    def partition(self, workers):
+        if self.channel_rate:
+            self.channel_rate /= workers
+            self.channel_burst = max(1, self.channel_burst // workers)
+            self._reset_channel_buckets()
+        if self._global_bucket:
+            bucket = self._global_bucket
+            self._global_bucket = TokenBucket(
+                bucket.rate / workers, max(1, bucket.capacity // workers), clock=self._clock,
+            )
+
+    def copy(self, send, retry_after=None):
+        bucket = self._global_bucket
+        return SendScheduler(
+            send,
+            channel_rate=self.channel_rate,
+            channel_burst=self.channel_burst,
+            global_rate=bucket.rate if bucket else 0,
+            global_burst=bucket.capacity if bucket else 0,
+            coalesce=self.coalesce,
+            coalesce_limit=self.coalesce_limit,
+            coalesce_separator=self.coalesce_separator,
+            retry_after=retry_after or self._retry_after,
+            channel_buckets=self.channel_buckets,
+            clock=self._clock,
+        )
+
+    @property
+    def depth(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    def channel_depth(self, channel):
+        return len(self._queues.get(channel, ()))
+
+    @property
+    def mean_latency(self):
+        return self.total_latency / self.sent if self.sent else 0.0
+
+    async def send(self, channel, text, **kwargs):
+        future = asyncio.get_event_loop().create_future()
+        self._queues.setdefault(channel, deque()).append(_PendingMessage(text, kwargs, future, self._clock()))
+        if channel not in self._workers:
+            self._workers[channel] = asyncio.ensure_future(self._work(channel))
+        return await future
+
+    def _delay(self, channel):
+        bucket = self._channel_buckets.get(channel) if self._channel_buckets is not None else None
+        delay = max(
+            self._paused_until - self._clock(),
+            bucket.delay() if bucket else 0,
+            self._global_bucket.delay() if self._global_bucket else 0,
+        )
+        if delay <= 0:
+            if bucket:
+                bucket.consume()
+            if self._global_bucket:
+                self._global_bucket.consume()
+        return delay
+
+    def _take(self, queue):
+        batch = [queue.popleft()]
+        if not self.coalesce:
+            return batch
+        length = len(batch[0].text)
+        while queue and queue[0].kwargs == batch[0].kwargs:
+            length += len(self.coalesce_separator) + len(queue[0].text)
+            if length > self.coalesce_limit:
+                break
+            batch.append(queue.popleft())
+        return batch
+
+    async def _work(self, channel):
+        queue = self._queues[channel]
+        try:
+            while queue:
+                delay = self._delay(channel)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+
+                batch = self._take(queue)
+                text = self.coalesce_separator.join(message.text for message in batch)
+                try:
+                    result = await self._send(channel, text, **batch[0].kwargs)
+                except Exception as e:
+                    retry_after = self._retry_after(e)
+                    if retry_after is not None:
+                        self.rate_limited += 1
+                        self._paused_until = max(self._paused_until, self._clock() + retry_after)
+                        queue.extendleft(reversed(batch))
+                        continue
+                    for message in batch:
+                        if not message.future.done():
+                            message.future.set_exception(e)
+                    continue
+
+                now = self._clock()
+                self.posts += 1
+                for message in batch:
+                    latency = now - message.enqueued_at
+                    self.sent += 1
+                    self.total_latency += latency
+                    self.max_latency = max(self.max_latency, latency)
+                    if not message.future.done():
+                        message.future.set_result(result)
+        finally:
+            del self._workers[channel]
+            if queue:
+                for message in queue:
+                    if not message.future.done():
+                        message.future.cancel()
+                queue.clear()
+            del self._queues[channel]
+
+    async def close(self, timeout=10):
+        workers = list(self._workers.values())
+        if not workers:
+            return
+        done, pending = await asyncio.wait(workers, timeout=timeout)
+        for worker in pending:
+            worker.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,176 @@
+import asyncio
+import importlib
+import logging
+import os
+import sys
+import time
+from collections import namedtuple
+
+from .arguments import compile_parser
+
+PLUGIN_PACKAGE = 'joonbot.plugins'
+
+# Everything the router and help index need, so implementation modules only import on first use.
+PluginCommand = namedtuple('PluginCommand', ['target', 'aliases', 'doc', 'group', 'cost'])
+PluginCommand.__new__.__defaults__ = ('__all__', 1)
+PluginSignalHandler = namedtuple('PluginSignalHandler', ['signal', 'target', 'priority'])
+PluginSignalHandler.__new__.__defaults__ = (0,)
+
+
+def resolve(target, package=PLUGIN_PACKAGE):
+    module, _, attr = target.partition(':')
+    return getattr(importlib.import_module(module, package), attr)
+
+
+class LazyCommand:
+    def __init__(self, target, doc=None, package=PLUGIN_PACKAGE):
+        self.target = target
+        self.package = package
+        self.__name__ = target.partition(':')[2]
+        self.__doc__ = doc
+        self._func = None
+        self._parser = None
+
+    @property
+    def loaded(self):
+        return self._func is not None
+
+    def load(self):
+        if self._func is None:
+            func = resolve(self.target, self.package)
+            self._parser = compile_parser(func)
+            self._func = func
+        return self._func
+
+    @property
+    def parser(self):
+        self.load()
+        return self._parser
+
+    async def __call__(self, *args, **kwargs):
+        return await self.load()(*args, **kwargs)
+
+
+def load_plugins(bot, package=PLUGIN_PACKAGE):
+    manifest = importlib.import_module(package)
+    for command in manifest.COMMANDS:
+        bot.add_command(
+            LazyCommand(command.target, command.doc, package),
+            aliases=list(command.aliases),
+            group=command.group,
+            cost=command.cost,
+        )
+    # Signal handlers run on every message, so they are resolved right away.
+    for handler in manifest.SIGNAL_HANDLERS:
+        bot.register_signal_handler(handler.signal, resolve(handler.target, package), priority=handler.priority)
+
+
+def _restore_modules(previous):
+    for name, module in previous.items():
+        sys.modules[name] = module
+        parent, _, child = name.rpartition('.')
+        if parent in sys.modules:
+            setattr(sys.modules[parent], child, module)
+
+
+def reload_plugins(bot, package=PLUGIN_PACKAGE):
+    # Imports the manifest and every plugin module loaded so far as fresh module objects, so
+    # commands already running keep the globals of the version they started with. Any exception
+    # leaves the running registry and modules untouched. Clones and shares of ``bot`` follow.
+    names = [package] + sorted(name for name in sys.modules if name.startswith(package + '.'))
+    previous = {name: sys.modules.pop(name) for name in names if name in sys.modules}
+    try:
+        importlib.invalidate_caches()
+        for name in names:
+            importlib.import_module(name)
+        staging = bot.build_registry(lambda registry: load_plugins(registry, package))
+    except Exception:
+        for name in names:
+            sys.modules.pop(name, None)
+        _restore_modules(previous)
+        raise
+    bot.adopt_registry(staging)
+    return names
+
+
+class PluginWatcher:
+    # Reloads when a file of the package changes (watch_package) or when another process writes
+    # the trigger file through broadcast(), which is how one worker reloads all of them.
+    def __init__(self, bot, package=PLUGIN_PACKAGE, interval=2, trigger=None, watch_package=True, logger=None):
+        self.bot = bot
+        self.package = package
+        self.interval = interval
+        self.trigger = trigger
+        self.watch_package = watch_package
+        self.logger = logger or logging.getLogger(__name__)
+        self.reloads = 0
+        self._task = None
+        self._mtimes = None
+        self._generation = None
+
+    def scan(self):
+        directory = os.path.dirname(importlib.import_module(self.package).__file__)
+        mtimes = {}
+        for name in os.listdir(directory):
+            if name.endswith('.py'):
+                mtimes[name] = os.stat(os.path.join(directory, name)).st_mtime
+        return mtimes
+
+    def read_trigger(self):
+        if self.trigger is None:
+            return None
+        try:
+            with open(self.trigger) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    # Asks every other watcher sharing the trigger file to reload; returns False without one.
+    def broadcast(self):
+        if self.trigger is None:
+            return False
+        generation = '{} {!r}'.format(os.getpid(), time.time())
+        with open(self.trigger, 'w') as f:
+            f.write(generation)
+        self._generation = generation
+        return True
+
+    # noinspection PyBroadException
+    def check(self):
+        changed = False
+        if self.watch_package:
+            mtimes = self.scan()
+            changed = self._mtimes is not None and mtimes != self._mtimes
+            self._mtimes = mtimes
+        generation = self.read_trigger()
+        if generation != self._generation:
+            self._generation = generation
+            changed = True
+        if not changed:
+            return False
+        try:
+            modules = reload_plugins(self.bot, self.package)
+        except Exception:
+            self.logger.exception('Failed to reload plugins; keeping the running version.')
+            return False
+        self.reloads += 1
+        self.logger.info('Reloaded {}.'.format(', '.join(modules)))
+        return True
+
+    async def _watch(self):
+        while True:
+            self.check()
+            await asyncio.sleep(self.interval)
+
+    async def start(self, _=None):
+        if self._task is None:
+            if self.watch_package:
+                self._mtimes = self.scan()
+            self._generation = self.read_trigger()
+            self._task = asyncio.ensure_future(self._watch())
+
+    async def close(self, _=None):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
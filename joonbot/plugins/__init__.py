@@ -0,0 +1,38 @@
+import os
+
+from ..core import ChatBot
+from ..plugin import PluginCommand, PluginSignalHandler
+
+# Slack user ids allowed to run admin commands, e.g. JOONBOT_ADMINS=U010K3P2ZPW,U0123
+ADMINS = [user for user in os.getenv('JOONBOT_ADMINS', '').split(',') if user]
+
+COMMANDS = [
+    PluginCommand('.general:help_message', ['help', '?'], ' 이 메세지(도움말)을 보여줍니다.'),
+    PluginCommand('.general:echo', ['echo', '에코'], ' 흔한 echo '),
+    PluginCommand('.air_pollution:air_pollution', ['dust', '미세먼지'], ' 실시간 미세먼지 정보 / Usage: _미세먼지 측정소_', cost=2),
+    PluginCommand(
+        '.air_pollution:subscribe', ['subscribe', '구독'],
+        ' 매일 정해진 시각에 미세먼지 정보를 보내 드립니다 / Usage: _구독 측정소 [08:00]_',
+    ),
+    PluginCommand(
+        '.air_pollution:unsubscribe', ['unsubscribe', '구독취소'],
+        ' 미세먼지 정보 구독을 취소합니다 / Usage: _구독취소 측정소 [08:00]_',
+    ),
+    PluginCommand('.air_pollution:subscriptions', ['subscriptions', '구독목록'], ' 이 채널의 미세먼지 정보 구독 목록을 보여줍니다 '),
+    PluginCommand(
+        '.covid19:covid19', ['covid19', 'corona', 'coronavirus', '코로나', '신종코로나', '코로나바이러스', '코로나19'],
+        ' 준 실시간 코로나바이러스19 전세계 감염 현황 ', cost=2,
+    ),
+    PluginCommand(
+        '.minecraft:minecraft', ['mcstatus', 'mc', 'minecraft', 'mcserver', '마크', '마인크래프트', '마크서버'],
+        ' 마인크래프트 서버 확인 ', cost=3,
+    ),
+    PluginCommand('.general:hello', ['hello', 'hi', '하이', 'ㅎㅇ', '안녕', '안뇽'], ' 준봇에게 인사합니다. '),
+    PluginCommand('.general:bot_version', ['version', '버전'], ' 준봇의 버전을 확인합니다. '),
+    PluginCommand('.admin:reload', ['reload', '리로드'], ' 커맨드를 다시 불러옵니다 (관리자 전용) ', group=ADMINS),
+]
+
+SIGNAL_HANDLERS = [
+    PluginSignalHandler(ChatBot.TRIGGERED_SIGNAL, '.signals:ignore_bot'),
+    PluginSignalHandler(ChatBot.INVALID_COMMAND_SIGNAL, '.signals:unknown_msg'),
+]
@@ -0,0 +1,18 @@
+from ..bot import joonbot
+from ..plugin import reload_plugins
+
+
+# noinspection PyBroadException
+async def reload(*_, bot, channel, **__):
+    try:
+        modules = reload_plugins(joonbot)
+    except Exception:
+        bot.logger.exception('Failed to reload plugins.')
+        await bot.send_message(channel=channel, text='커맨드를 다시 불러오지 못했습니다. 기존 버전을 계속 사용합니다.')
+        return
+    from ..app import plugin_watcher
+
+    message = '{}개 모듈을 다시 불러왔습니다.'.format(len(modules))
+    if plugin_watcher.broadcast():
+        message += ' 다른 워커에는 {:g}초 안에 반영됩니다.'.format(plugin_watcher.interval)
+    await bot.send_message(channel=channel, text=message)
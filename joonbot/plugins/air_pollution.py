@@ -0,0 +1,80 @@
+import asyncio
+
+import aiohttp
+
+from ..arguments import Text
+from ..bot import air_pollution_message, air_pollution_subscriptions, fetch_air_pollution
+from ..core import SlackBot
+from ..scheduler import parse_time_of_day
+
+
+async def air_pollution(_, station: Text = None, *, bot, channel, http, **__):
+    if station is None:
+        await bot.send_message(channel=channel, text='측정소를 입력해 주세요.')
+        return
+
+    try:
+        resp_json = await fetch_air_pollution(http, station)
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        await bot.send_message(channel=channel, text='현재 사용할 수 없는 기능입니다.')
+        return
+
+    await bot.send_message(channel=channel, text=air_pollution_message(station, resp_json))
+
+
+def parse_subscription_args(args, default_at=None):
+    if len(args) < 2:
+        return None, None
+    at = parse_time_of_day(args[-1]) if len(args) > 2 else None
+    station = ' '.join(args[1:-1] if at else args[1:])
+    return station, at or default_at
+
+
+async def reject_outside_slack(bot, channel):
+    if bot.platform == SlackBot.PLATFORM:
+        return False
+    await bot.send_message(channel=channel, text='슬랙에서만 사용할 수 있는 기능입니다.')
+    return True
+
+
+async def subscribe(*args, bot, channel, extra, **_):
+    if await reject_outside_slack(bot, channel):
+        return
+    station, at = parse_subscription_args(args, default_at='08:00')
+    if not station:
+        await bot.send_message(channel=channel, text='측정소를 입력해 주세요.')
+        return
+
+    subscription = await air_pollution_subscriptions.subscribe(extra.get('team_id', ''), channel, station, at)
+    if subscription is None:
+        message = '이미 매일 {}에 {} 미세먼지 정보를 받고 있어요.'.format(at, station)
+    else:
+        message = '매일 {}에 {} 미세먼지 정보를 보내 드릴게요.'.format(at, station)
+    await bot.send_message(channel=channel, text=message)
+
+
+async def unsubscribe(*args, bot, channel, extra, **_):
+    if await reject_outside_slack(bot, channel):
+        return
+    station, at = parse_subscription_args(args)
+    if not station:
+        await bot.send_message(channel=channel, text='측정소를 입력해 주세요.')
+        return
+
+    if await air_pollution_subscriptions.unsubscribe(extra.get('team_id', ''), channel, station, at):
+        message = '{} 미세먼지 정보 구독을 취소했어요.'.format(station)
+    else:
+        message = '{} 미세먼지 정보를 구독하고 있지 않아요.'.format(station)
+    await bot.send_message(channel=channel, text=message)
+
+
+async def subscriptions(*_, bot, channel, extra, **__):
+    if await reject_outside_slack(bot, channel):
+        return
+    subscription_list = await air_pollution_subscriptions.subscriptions(extra.get('team_id', ''), channel)
+    if not subscription_list:
+        await bot.send_message(channel=channel, text='구독 중인 미세먼지 정보가 없어요.')
+        return
+    message = '미세먼지 정보 구독 목록\n'
+    message += '\n'.join('{} - {}'.format(subscription.at, subscription.topic) for subscription in subscription_list)
+    await bot.send_message(channel=channel, text=message)
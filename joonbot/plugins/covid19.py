@@ -0,0 +1,40 @@
+import asyncio
+
+import aiohttp
+
+from ..arguments import Text
+from ..bot import covid19_dataset
+from ..covid19 import format_count
+
+
+async def covid19(_, target: (int, Text) = None, *, bot, channel, **__):
+    if isinstance(target, int):
+        page, country = target, None
+    else:
+        page, country = 1, target
+
+    try:
+        snapshot = await covid19_dataset.get()
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        await bot.send_message(channel=channel, text='현재 사용할 수 없는 기능입니다.')
+        return
+
+    if country:
+        stat = snapshot.find(country)
+        if stat is None:
+            await bot.send_message(channel=channel, text='국가를 찾을 수 없습니다.')
+            return
+        message = '*{}* COVID-19 감염 현황\n'.format(stat.country_name)
+        message += '*확진*: {}\n'.format(format_count(stat.cases))
+        message += '*사망*: {}\n'.format(format_count(stat.deaths))
+        message += '*완치*: {}\n'.format(format_count(stat.total_recovered))
+    else:
+        page, num_pages, stat_list = snapshot.page(page)
+
+        message = '전세계 COVID-19 감염 현황 (페이지: {} / {})\n'.format(page, num_pages)
+        message += '*주의*: 실시간과 다소 차이가 있을 수 있음\n\n'
+        message += '국가: 확진 / 사망 / 완치\n'
+        message += '----------------------------\n'
+        message += '\n'.join(stat_list)
+
+    await bot.send_message(channel=channel, text=message)
@@ -0,0 +1,31 @@
+import random
+
+
+async def help_message(*args, bot, user, channel, **_):
+    message = bot.help_index.render(user, args[1:])
+    await bot.send_message(channel=channel, text=message)
+
+
+async def echo(*args, bot, channel, **_):
+    revised_text = ' '.join(args[1:])
+    await bot.send_message(channel=channel, text=revised_text)
+
+
+async def hello(*_, bot, channel, **__):
+    messages = [
+        'ㅎㅇㅎㅇ',
+        '안녕하세요! 저는 준봇이에요.',
+        '준봇 여기있습니다!',
+        '부르셨나요?',
+        'ㅎㅇ',
+        'no',
+        '하위^^',
+    ]
+
+    await bot.send_message(channel=channel, text=random.choice(messages))
+
+
+async def bot_version(*_, bot, channel, **__):
+    from .. import __version__
+
+    await bot.send_message(channel=channel, text='joonbot {}'.format(__version__))
@@ -0,0 +1,49 @@
+import asyncio
+
+from ..arguments import choice
+from ..bot import minecraft_client
+
+MC_METHOD = choice('status', 'ping', 'query')
+
+
+async def minecraft(_, address=None, method: MC_METHOD = 'status', *, bot, channel, **__):
+    if address is None:
+        await bot.send_message(channel=channel, text='서버 주소를 입력해주세요.')
+        return
+
+    try:
+        host, port, result = await minecraft_client.fetch(address, method)
+        message = 'Minecraft server `{}:{}`\n'.format(host, port)
+        if method == 'status':
+            status = result
+            message += '*Version*: {} (protocol {})\n'.format(status.version.name, status.version.protocol)
+            message += '*Description*: {}\n'.format(status.description)
+            message += '*Players online* ({} / {})'.format(status.players.online, status.players.max)
+            player_list = status.players.sample
+            if player_list:
+                message += ':\n'
+                message += '\n'.join(['- {} (`{}`)'.format(player.name, player.id) for player in player_list])
+        elif method == 'ping':
+            latency = result
+            message += '*Ping*: {} ms\n'.format(latency)
+        else:
+            query = result
+            message += '*Software*: {} {}\n'.format(query.software.brand, query.software.version)
+            message += '*Plugins:'
+            if query.software.plugins:
+                message += '\n'.join(['- {}'.format(plugin) for plugin in query.software.plugins])
+            else:
+                message += 'none'
+            message += '\n'
+            message += '*MOTD*: `{}`\n'.format(query.motd)
+            message += '*Players online* ({} / {})'.format(query.players.online, query.players.max)
+            player_list = query.players.names
+            if player_list:
+                message += ':\n'
+                message += '\n'.join(['- {}'.format(name) for name in query.players.names])
+    except (OSError, asyncio.TimeoutError):
+        message = '서버 주소를 찾을 수 없거나 서버가 응답하지 않았습니다.'
+    except ValueError:
+        message = '서버에 오류가 있는 것 같습니다.'
+
+    await bot.send_message(channel=channel, text=message)
@@ -0,0 +1,28 @@
+import math
+
+from ..core import SlackBot
+from ..exceptions import MessageHandleAborted
+
+
+async def ignore_bot(bot, user, extra, **_):
+    if await bot.is_bot(user, **extra):
+        raise MessageHandleAborted('bot')
+
+
+async def unknown_msg(bot, channel, reason, error=None, rate_limited=None, **_):
+    if reason == SlackBot.REASON_RATE_LIMITED:
+        # Only the first rejection of a burst gets a reply, otherwise the warnings become the flood.
+        if rate_limited.first:
+            await bot.send_message(
+                channel=channel,
+                text='요청이 너무 많습니다. {}초 후에 다시 시도해 주세요.'.format(math.ceil(rate_limited.retry_after)),
+            )
+        return
+    if reason == SlackBot.REASON_INVALID_ARGUMENT:
+        message = '잘못된 사용법입니다.\n'
+        if error:
+            message += '{}\n'.format(error)
+    else:
+        message = '존재하지 않는 커맨드이거나 권한이 없습니다.\n'
+    message += '자세한 사용법은 help 커맨드를 통해 확인해 주세요.'
+    await bot.send_message(channel=channel, text=message)
@@ -0,0 +1,103 @@
+import time
+from collections import OrderedDict, namedtuple
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, cost=1):
+        self._refill()
+        if self.tokens >= cost:
+            return 0
+        return (cost - self.tokens) / self.rate
+
+    def consume(self, cost=1):
+        self._refill()
+        if self.tokens < cost:
+            return False
+        self.tokens -= cost
+        return True
+
+
+class KeyedBuckets:
+    # One token bucket per key, least recently used keys are dropped past maxsize.
+    # A dropped key simply starts over with a full bucket.
+    def __init__(self, rate, capacity=None, maxsize=4096, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.maxsize = maxsize
+        self._clock = clock
+        self._buckets = OrderedDict()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def partition(self, workers):
+        return KeyedBuckets(self.rate / workers, max(1, self.capacity // workers), self.maxsize, self._clock)
+
+    def get(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity, self._clock)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+
+RateLimited = namedtuple('RateLimited', ['scope', 'retry_after', 'first'])
+
+
+class CommandRateLimiter:
+    SCOPES = ('user', 'channel', 'command')
+
+    # Each scope is a (rate per second, burst) pair, or None to leave it unlimited.
+    def __init__(self, user=(0.2, 5), channel=(1, 10), command=(5, 20), maxsize=4096, clock=time.monotonic):
+        limits = dict(zip(self.SCOPES, (user, channel, command)))
+        self._scopes = [
+            (scope, KeyedBuckets(limits[scope][0], limits[scope][1], maxsize, clock))
+            for scope in self.SCOPES if limits[scope]
+        ]
+        self.maxsize = maxsize
+        # Keys rejected since they last got through, so callers only warn once per burst.
+        self._rejected = OrderedDict()
+        self.rejected = 0
+
+    def __len__(self):
+        return sum(len(buckets) for _, buckets in self._scopes)
+
+    # Each of ``workers`` processes sees a share of the traffic, so each gets that share of the limits.
+    def partition(self, workers):
+        self._scopes = [(scope, table.partition(workers)) for scope, table in self._scopes]
+
+    def check(self, user, channel, command, cost=1):
+        if cost <= 0:
+            return None
+        keys = {'user': user, 'channel': channel, 'command': command}
+        buckets = [(scope, keys[scope], table.get(keys[scope])) for scope, table in self._scopes]
+        # Nothing is consumed unless every scope can afford the cost.
+        for scope, key, bucket in buckets:
+            delay = bucket.delay(min(cost, bucket.capacity))
+            if delay:
+                self.rejected += 1
+                first = (scope, key) not in self._rejected
+                self._rejected[scope, key] = True
+                self._rejected.move_to_end((scope, key))
+                while len(self._rejected) > self.maxsize:
+                    self._rejected.popitem(last=False)
+                return RateLimited(scope, delay, first)
+        for scope, key, bucket in buckets:
+            bucket.consume(min(cost, bucket.capacity))
+            self._rejected.pop((scope, key), None)
+        return None
@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import time
+import traceback
+from collections import deque, namedtuple
+
+from .ratelimit import TokenBucket
+
+
+class ErrorRecord(namedtuple('ErrorRecord', ['time', 'fingerprint', 'type', 'message', 'exception', 'context'])):
+    __slots__ = ()
+
+    # Formatted on demand: most records are aggregated or suppressed and never posted.
+    @property
+    def traceback(self):
+        return ''.join(self.exception.format())
+
+
+def _fingerprint(exc_type, frames):
+    location = '{}:{}'.format(frames[-1][0], frames[-1][2]) if frames else ''
+    key = '{}.{}@{}'.format(exc_type.__module__, exc_type.__qualname__, location)
+    return hashlib.sha1(key.encode()).hexdigest()[:10]
+
+
+class _Window:
+    __slots__ = ('expires_at', 'count', 'record')
+
+    def __init__(self, expires_at, record):
+        self.expires_at = expires_at
+        self.count = 0
+        self.record = record
+
+
+class ErrorReporter:
+    def __init__(self, post, window=60, max_posts_per_minute=10, history=100, clock=time.monotonic):
+        self._post = post
+        self.window = window
+        self._bucket = TokenBucket(max_posts_per_minute / 60, max_posts_per_minute, clock=clock)
+        self._clock = clock
+        self._windows = {}
+        self._flushes = set()
+        self.history = deque(maxlen=history)
+        self.reported = 0
+        self.aggregated = 0
+        self.suppressed = 0
+
+    # Each of ``workers`` processes aggregates on its own, so each gets that share of the post budget.
+    def partition(self, workers):
+        bucket = self._bucket
+        self._bucket = TokenBucket(bucket.rate / workers, max(1, bucket.capacity // workers), clock=self._clock)
+
+    def record(self, exc_info, **context):
+        error_type, error, _ = exc_info
+        # Walks the frames once without reading source lines and without keeping the frames alive.
+        exception = traceback.TracebackException(*exc_info, lookup_lines=False)
+        record = ErrorRecord(
+            time=time.time(),
+            fingerprint=_fingerprint(error_type, exception.stack),
+            type=error_type.__name__,
+            message=str(error),
+            exception=exception,
+            context=context,
+        )
+        self.history.append(record)
+        return record
+
+    def recent(self, limit=None, fingerprint=None):
+        records = [record for record in reversed(self.history)
+                   if fingerprint is None or record.fingerprint == fingerprint]
+        return records[:limit] if limit is not None else records
+
+    async def report(self, record):
+        window = self._windows.get(record.fingerprint)
+        if window is not None:
+            window.count += 1
+            self.aggregated += 1
+            return
+
+        self._windows[record.fingerprint] = _Window(self._clock() + self.window, record)
+        flush = asyncio.ensure_future(self._flush_later(record.fingerprint))
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+        await self._send('```{}```'.format(record.traceback))
+
+    async def _flush_later(self, error_fingerprint):
+        await asyncio.sleep(self.window)
+        window = self._windows.pop(error_fingerprint)
+        if window.count:
+            await self._send('```{}: {}```\n같은 오류가 최근 {}초 동안 {}번 더 발생했습니다. (fingerprint `{}`)'.format(
+                window.record.type,
+                window.record.message,
+                self.window,
+                window.count,
+                error_fingerprint,
+            ))
+
+    async def _send(self, text):
+        if not self._bucket.consume():
+            self.suppressed += 1
+            return
+        self.reported += 1
+        await self._post(text)
+
+    async def close(self):
+        for flush in list(self._flushes):
+            flush.cancel()
+        await asyncio.gather(*self._flushes, return_exceptions=True)
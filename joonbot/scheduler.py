@@ -0,0 +1,216 @@
+import asyncio
+import concurrent.futures
+import datetime
+import heapq
+import logging
+import sqlite3
+import time
+from collections import namedtuple
+
+KST = datetime.timezone(datetime.timedelta(hours=9), 'KST')
+
+Subscription = namedtuple('Subscription', ['id', 'team', 'channel', 'topic', 'at'])
+
+
+def parse_time_of_day(text):
+    hour, _, minute = text.partition(':')
+    try:
+        hour, minute = int(hour), int(minute or 0)
+    except ValueError:
+        return None
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        return None
+    return '{:02d}:{:02d}'.format(hour, minute)
+
+
+def next_run(at, now, tz=KST):
+    hour, minute = map(int, at.split(':'))
+    run = datetime.datetime.fromtimestamp(now, tz).replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if run.timestamp() <= now:
+        run += datetime.timedelta(days=1)
+    return run.timestamp()
+
+
+class SubscriptionStore:
+    def __init__(self, path):
+        self.path = path
+        self._db = None
+        self._executor = None
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            # AUTOINCREMENT keeps ids of removed subscriptions from being reused while they are still queued.
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS subscriptions ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, team TEXT NOT NULL, channel TEXT NOT NULL, '
+                'topic TEXT NOT NULL, at TEXT NOT NULL, UNIQUE (team, channel, topic, at))'
+            )
+        return self._db
+
+    def add(self, team, channel, topic, at):
+        cursor = self.db.execute(
+            'INSERT OR IGNORE INTO subscriptions (team, channel, topic, at) VALUES (?, ?, ?, ?)',
+            (team, channel, topic, at),
+        )
+        if not cursor.rowcount:
+            return None
+        return Subscription(cursor.lastrowid, team, channel, topic, at)
+
+    def remove(self, team, channel, topic, at=None):
+        query = 'SELECT id FROM subscriptions WHERE team = ? AND channel = ? AND topic = ?'
+        params = [team, channel, topic]
+        if at is not None:
+            query += ' AND at = ?'
+            params.append(at)
+        ids = [row[0] for row in self.db.execute(query, params)]
+        self.db.executemany('DELETE FROM subscriptions WHERE id = ?', [(i,) for i in ids])
+        return ids
+
+    def list(self, team=None, channel=None):
+        query = 'SELECT id, team, channel, topic, at FROM subscriptions'
+        if team is not None:
+            query += ' WHERE team = ? AND channel = ? ORDER BY at, topic'
+            return [Subscription(*row) for row in self.db.execute(query, (team, channel))]
+        return [Subscription(*row) for row in self.db.execute(query)]
+
+    # Runs a store method off the event loop; a single thread keeps the connection used serially.
+    async def run(self, method, *args):
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        return await asyncio.get_event_loop().run_in_executor(self._executor, method, *args)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class SubscriptionScheduler:
+    def __init__(self, store, fetch, deliver, tz=KST, sync_interval=60, logger=None, clock=time.time):
+        self.store = store
+        self.fetch = fetch
+        self.deliver = deliver
+        self.tz = tz
+        self.sync_interval = sync_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self._clock = clock
+        self._subscriptions = {}
+        self._heap = []
+        self._publishing = set()
+        self._wakeup = None
+        self._task = None
+        self.fetches = 0
+        self.delivered = 0
+        self.failed = 0
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def _schedule(self, subscription, now):
+        self._subscriptions[subscription.id] = subscription
+        run_at = next_run(subscription.at, now, self.tz)
+        heapq.heappush(self._heap, (run_at, subscription.id))
+        if self._wakeup is not None and self._heap[0][1] == subscription.id:
+            self._wakeup.set()
+
+    async def subscribe(self, team, channel, topic, at):
+        subscription = await self.store.run(self.store.add, team, channel, topic, at)
+        if subscription is not None:
+            self._schedule(subscription, self._clock())
+        return subscription
+
+    async def unsubscribe(self, team, channel, topic, at=None):
+        ids = await self.store.run(self.store.remove, team, channel, topic, at)
+        # Heap entries of removed subscriptions are skipped when they come due.
+        for subscription_id in ids:
+            self._subscriptions.pop(subscription_id, None)
+        return len(ids)
+
+    async def subscriptions(self, team, channel):
+        return await self.store.run(self.store.list, team, channel)
+
+    async def sync(self):
+        # Picks up subscriptions added or removed by other worker processes.
+        stored = {subscription.id: subscription for subscription in await self.store.run(self.store.list)}
+        now = self._clock()
+        for subscription_id in self._subscriptions.keys() - stored.keys():
+            del self._subscriptions[subscription_id]
+        for subscription_id in stored.keys() - self._subscriptions.keys():
+            self._schedule(stored[subscription_id], now)
+
+    def tick(self, now):
+        due = {}
+        next_runs = {}
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            run_at, subscription_id = heapq.heappop(heap)
+            subscription = self._subscriptions.get(subscription_id)
+            if subscription is None:
+                continue
+            due.setdefault(subscription.topic, []).append(subscription)
+            key = subscription.at, max(now, run_at)
+            if key not in next_runs:
+                next_runs[key] = next_run(subscription.at, key[1], self.tz)
+            heapq.heappush(heap, (next_runs[key], subscription_id))
+        for topic, subscriptions in due.items():
+            task = asyncio.ensure_future(self.publish(topic, subscriptions))
+            self._publishing.add(task)
+            task.add_done_callback(self._publishing.discard)
+        return due
+
+    # noinspection PyBroadException
+    async def publish(self, topic, subscriptions):
+        self.fetches += 1
+        try:
+            text = await self.fetch(topic)
+        except Exception:
+            self.failed += len(subscriptions)
+            self.logger.exception('Failed to fetch {} for {} subscriptions.'.format(topic, len(subscriptions)))
+            return
+        results = await asyncio.gather(
+            *[self.deliver(subscription, text) for subscription in subscriptions],
+            return_exceptions=True,
+        )
+        for subscription, result in zip(subscriptions, results):
+            if isinstance(result, Exception):
+                self.failed += 1
+                self.logger.error('Failed to deliver {} to {}.'.format(topic, subscription.channel), exc_info=result)
+            else:
+                self.delivered += 1
+
+    async def _run(self):
+        next_sync = self._clock() + self.sync_interval
+        while True:
+            self._wakeup.clear()
+            now = self._clock()
+            if now >= next_sync:
+                await self.sync()
+                next_sync = now + self.sync_interval
+            self.tick(now)
+            # Waking up at least every sync interval also corrects for wall clock jumps.
+            wake_at = min(self._heap[0][0], next_sync) if self._heap else next_sync
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0, wake_at - self._clock()))
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self, _=None):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            await self.sync()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def close(self, _=None):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._publishing:
+            await asyncio.wait(self._publishing, timeout=10)
+        self.store.close()
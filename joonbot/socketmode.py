@@ -0,0 +1,113 @@
+import asyncio
+import json
+import logging
+import random
+import time
+
+import aiohttp
+
+
+class SocketModeReceiver:
+    OPEN_URL = 'https://slack.com/api/apps.connections.open'
+
+    def __init__(self, event_handler, app_token, connections=2, open_url=None,
+                 backoff_base=1, backoff_max=30, reconnect_delay=1, stable_after=60, logger=None,
+                 clock=time.monotonic):
+        self.event_handler = event_handler
+        self._app_token = app_token
+        self.connections = connections
+        self.open_url = open_url or self.OPEN_URL
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Every reconnect waits at least reconnect_delay; the backoff only resets once a
+        # connection has stayed up for stable_after seconds.
+        self.reconnect_delay = reconnect_delay
+        self.stable_after = stable_after
+        self._clock = clock
+        self._session = None
+        self.logger = logger or logging.getLogger(__name__)
+        self._tasks = []
+        self.connected = 0
+        self.reconnects = 0
+        self.envelopes = 0
+
+    @property
+    def session(self):
+        # Kept apart from the shared HttpClient, whose total timeout would cut long-lived websockets.
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def open_connection(self):
+        async with self.session.post(self.open_url, headers={
+            'Authorization': 'Bearer {}'.format(self._app_token),
+        }) as resp:
+            data = await resp.json(content_type=None)
+        if not data.get('ok'):
+            raise ConnectionError('apps.connections.open failed: {}'.format(data.get('error')))
+        return data['url']
+
+    async def handle_message(self, ws, message):
+        data = json.loads(message)
+        message_type = data.get('type')
+        if message_type == 'disconnect':
+            return False
+        envelope_id = data.get('envelope_id')
+        if envelope_id is None:
+            return True
+
+        self.envelopes += 1
+        await ws.send_str(json.dumps({'envelope_id': envelope_id}))
+        if message_type == 'events_api':
+            self.event_handler.dispatch_event(data['payload'], retry=bool(data.get('retry_attempt')))
+        return True
+
+    def _next_delay(self, backoff, connected_at, failed):
+        if connected_at is not None and self._clock() - connected_at >= self.stable_after:
+            backoff = self.backoff_base
+            if not failed:
+                return self.reconnect_delay, backoff
+            return backoff * random.uniform(0.5, 1), backoff
+        # Closed or failed right away: a server that keeps dropping the socket must not be hammered.
+        return max(self.reconnect_delay, backoff * random.uniform(0.5, 1)), min(backoff * 2, self.backoff_max)
+
+    # noinspection PyBroadException
+    async def _run_connection(self, index):
+        backoff = self.backoff_base
+        while True:
+            connected_at = None
+            try:
+                url = await self.open_connection()
+                async with self.session.ws_connect(url, heartbeat=30) as ws:
+                    self.connected += 1
+                    connected_at = self._clock()
+                    try:
+                        async for message in ws:
+                            if message.type != aiohttp.WSMsgType.TEXT:
+                                break
+                            if not await self.handle_message(ws, message.data):
+                                break
+                    finally:
+                        self.connected -= 1
+                delay, backoff = self._next_delay(backoff, connected_at, failed=False)
+                self.logger.info('Socket Mode connection {} closed, reconnecting in {:.1f}s.'.format(index, delay))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                delay, backoff = self._next_delay(backoff, connected_at, failed=True)
+                self.logger.exception('Socket Mode connection {} failed, retrying in {:.1f}s.'.format(index, delay))
+            await asyncio.sleep(delay)
+            self.reconnects += 1
+
+    async def start(self, _=None):
+        if not self._tasks:
+            self._tasks = [asyncio.ensure_future(self._run_connection(i)) for i in range(self.connections)]
+
+    async def close(self, _=None):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
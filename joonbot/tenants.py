@@ -0,0 +1,70 @@
+import logging
+import os
+
+
+class TokenStore:
+    async def get_token(self, team_id):
+        raise NotImplementedError
+
+
+class StaticTokenStore(TokenStore):
+    def __init__(self, tokens=None):
+        self._tokens = dict(tokens or {})
+
+    @classmethod
+    def from_env(cls, variable='SLACK_TEAM_TOKENS'):
+        # SLACK_TEAM_TOKENS=T0123:xoxb-...,T0456:xoxb-...
+        tokens = {}
+        for item in os.getenv(variable, '').split(','):
+            team_id, _, token = item.strip().partition(':')
+            if team_id and token:
+                tokens[team_id] = token
+        return cls(tokens)
+
+    def set_token(self, team_id, token):
+        self._tokens[team_id] = token
+
+    async def get_token(self, team_id):
+        return self._tokens.get(team_id)
+
+
+class SlackTenants:
+    def __init__(self, bot, token_store=None, logger=None):
+        self.bot = bot
+        self.token_store = token_store
+        self.logger = logger or logging.getLogger(__name__)
+        self._tenants = {}
+        self.unknown_teams = 0
+
+    def __len__(self):
+        return len(self._tenants)
+
+    async def get(self, team_id):
+        if self.token_store is None:
+            return self.bot
+        tenant_bot = self._tenants.get(team_id)
+        if tenant_bot is not None:
+            return tenant_bot
+        token = await self.token_store.get_token(team_id) if team_id else None
+        if token is None:
+            return None
+        return self._tenants.setdefault(team_id, self.bot.tenant(token))
+
+    async def evict(self, team_id):
+        tenant_bot = self._tenants.pop(team_id, None)
+        if tenant_bot is not None:
+            await tenant_bot.outbound.close()
+
+    async def message_handler(self, payload):
+        team_id = payload.get('team_id')
+        tenant_bot = await self.get(team_id)
+        if tenant_bot is None:
+            self.unknown_teams += 1
+            self.logger.warning('No Slack token for team {}.'.format(team_id))
+            return
+        return await tenant_bot.message_handler(payload)
+
+    async def close(self, _=None):
+        for tenant_bot in self._tenants.values():
+            await tenant_bot.outbound.close()
+        self._tenants.clear()
@@ -0,0 +1,131 @@
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from .logs import stream_handler
+
+
+def bind_socket(host, port, backlog=128):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(index, workers, sock, slack_mode, reload=False):
+    from aiohttp import web
+
+    from .app import configure_worker, create_app
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    configure_worker(index, workers)
+    # Only the first worker owns the Discord gateway session, the subscription scheduler and the
+    # cache warm-ups; respawns keep the role.
+    server_app = create_app(
+        discord=index == 0, slack_mode=slack_mode, scheduler=index == 0, reload=reload, warm_up=index == 0,
+    )
+    web.run_app(server_app, sock=sock, print=None)
+
+
+def supervisor_logger():
+    # The supervisor only waits on its workers, so it writes its few lines directly rather than
+    # through a LogPipeline; workers start their own pipeline after the fork.
+    logger = logging.getLogger(__name__)
+    if not logger.handlers:
+        logger.addHandler(stream_handler(os.getenv('JOONBOT_LOG_FORMAT', 'json')))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+class Supervisor:
+    def __init__(self, workers, host='0.0.0.0', port=8080, slack_mode='http', reload=False, logger=None,
+                 min_uptime=10, backoff_base=1, backoff_max=60, max_failures=5, clock=time.monotonic):
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.slack_mode = slack_mode
+        self.reload = reload
+        self.logger = logger or supervisor_logger()
+        # A worker exiting within min_uptime of its start counts as a failure; after max_failures
+        # in a row the supervisor gives up.
+        self.min_uptime = min_uptime
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_failures = max_failures
+        self._clock = clock
+        self._context = multiprocessing.get_context('fork')
+        self._processes = {}
+        self._started_at = {}
+        self._failures = {}
+        self._respawn_at = {}
+        self._stopping = False
+        self._sock = None
+
+    def spawn(self, index):
+        process = self._context.Process(
+            target=run_worker,
+            args=(index, self.workers, self._sock, self.slack_mode, self.reload),
+            name='joonbot-worker-{}'.format(index),
+        )
+        process.start()
+        self._processes[index] = process
+        self._started_at[index] = self._clock()
+        return process
+
+    def stop(self, *_):
+        self._stopping = True
+
+    # Respawns exited workers; returns False once a worker keeps failing right after start.
+    def check(self):
+        now = self._clock()
+        for index, process in list(self._processes.items()):
+            if index in self._respawn_at:
+                if now >= self._respawn_at[index]:
+                    del self._respawn_at[index]
+                    self.spawn(index)
+                continue
+            if process.is_alive():
+                continue
+            if now - self._started_at[index] >= self.min_uptime:
+                self._failures[index] = 0
+                self.logger.warning('Worker %s exited with code %s, respawning.', index, process.exitcode)
+                self.spawn(index)
+                continue
+            failures = self._failures[index] = self._failures.get(index, 0) + 1
+            if failures >= self.max_failures:
+                self.logger.error('Worker %s failed %s times in a row right after starting (exit code %s), '
+                                  'giving up.', index, failures, process.exitcode)
+                return False
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (failures - 1))
+            self.logger.warning('Worker %s exited with code %s right after starting, respawning in %ss.',
+                                index, process.exitcode, delay)
+            self._respawn_at[index] = now + delay
+        return True
+
+    def run(self):
+        self._sock = bind_socket(self.host, self.port)
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.logger.info('Running on http://%s:%s with %s workers.', self.host, self.port, self.workers)
+        for index in range(self.workers):
+            self.spawn(index)
+        exit_code = 0
+        try:
+            while not self._stopping:
+                if not self.check():
+                    exit_code = 1
+                    break
+                time.sleep(1)
+        finally:
+            for process in self._processes.values():
+                process.terminate()
+            for process in self._processes.values():
+                process.join()
+            self._sock.close()
+        return exit_code
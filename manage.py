@@ -1,10 +1,60 @@
-from aiohttp import web
+import argparse
+import os
+import sys
 
-from joonbot.app import app
+from joonbot.loadtest import add_arguments as add_loadtest_arguments
 
 
-def main():
-    web.run_app(app)
+def runserver(args):
+    if args.workers > 1:
+        from joonbot.workers import Supervisor
+
+        supervisor = Supervisor(args.workers, host=args.host, port=args.port, slack_mode=args.slack, reload=args.reload)
+        sys.exit(supervisor.run())
+
+    from aiohttp import web
+
+    from joonbot.app import create_app
+
+    web.run_app(create_app(slack_mode=args.slack, reload=args.reload), host=args.host, port=args.port)
+
+
+def loadtest(args):
+    from joonbot import loadtest
+
+    loadtest.main(args)
+
+
+def main(argv=None):
+    # Plain `manage.py` runs the server too, so the top-level parser carries the same defaults.
+    defaults = {
+        'slack': os.getenv('SLACK_MODE', 'http'),
+        'workers': int(os.getenv('JOONBOT_WORKERS', 1)),
+        'host': '0.0.0.0',
+        'port': 8080,
+        'reload': os.getenv('JOONBOT_RELOAD', '').lower() in ('1', 'true', 'yes'),
+    }
+    parser = argparse.ArgumentParser(description='Joon Bot')
+    parser.set_defaults(func=runserver, **defaults)
+    subparsers = parser.add_subparsers()
+
+    runserver_parser = subparsers.add_parser('runserver', help='run the bot (default)')
+    runserver_parser.set_defaults(func=runserver)
+    runserver_parser.add_argument('--slack', choices=['http', 'socket'], default=defaults['slack'],
+                                  help='receive Slack events over the HTTP endpoint or Socket Mode')
+    runserver_parser.add_argument('--workers', type=int, default=defaults['workers'],
+                                  help='number of worker processes sharing the port')
+    runserver_parser.add_argument('--host', default=defaults['host'])
+    runserver_parser.add_argument('--port', type=int, default=defaults['port'])
+    runserver_parser.add_argument('--reload', action='store_true', default=defaults['reload'],
+                                  help='reload command plugins when their files change')
+
+    loadtest_parser = subparsers.add_parser('loadtest', help='replay Slack events through the app against stubs')
+    loadtest_parser.set_defaults(func=loadtest)
+    add_loadtest_arguments(loadtest_parser)
+
+    args = parser.parse_args(argv)
+    args.func(args)
 
 
 if __name__ == '__main__':
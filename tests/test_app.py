@@ -0,0 +1,101 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import unittest
+
+from aiohttp import web
+
+os.environ.setdefault('SLACK_SIGNING_SECRET', 'test-signing-secret')
+
+from joonbot.app import SlackEventHandler  # noqa: E402
+from joonbot.events import SqliteEventDeduplicator  # noqa: E402
+
+
+class FakeRequest:
+    can_read_body = True
+
+    def __init__(self, headers, body):
+        self.headers = headers
+        self._body = body
+
+    async def read(self):
+        return self._body
+
+
+def signed_request(secret, data, timestamp, headers=None):
+    body = json.dumps(data).encode()
+    basestring = 'v0:{}:'.format(timestamp).encode() + body
+    request_headers = {
+        'X-Slack-Request-Timestamp': str(timestamp),
+        'X-Slack-Signature': 'v0=' + hmac.new(secret.encode(), basestring, hashlib.sha256).hexdigest(),
+    }
+    request_headers.update(headers or {})
+    return FakeRequest(request_headers, body)
+
+
+class TestSlackEventHandler(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+        self.handler = SlackEventHandler(slack_signing_secret='secret', clock=lambda: 1000)
+        self.events = []
+
+        @self.handler.on('message')
+        def on_message(data):
+            self.events.append(data['event_id'])
+
+    def handle(self, request):
+        return self.loop.run_until_complete(self.handler.handle_event(request))
+
+    def test_url_verification(self):
+        data = {'type': 'url_verification', 'challenge': 'challenge'}
+        self.assertEqual(self.handle(signed_request('secret', data, 1000)).text, 'challenge')
+
+    def test_rejects_bad_requests(self):
+        data = {'type': 'url_verification', 'challenge': 'challenge'}
+        for request in (
+            signed_request('wrong', data, 1000),
+            signed_request('secret', data, 1000 - 301),
+            signed_request('secret', data, 'now'),
+        ):
+            with self.assertRaises(web.HTTPForbidden):
+                self.handle(request)
+
+    def test_retry_deduplication(self):
+        data = {'type': 'event_callback', 'event_id': 'Ev1', 'event': {'type': 'message'}}
+        self.handle(signed_request('secret', data, 1000))
+        self.handle(signed_request('secret', data, 1000, {'X-Slack-Retry-Num': '1'}))
+        self.assertEqual(self.events, ['Ev1'])
+        self.assertEqual(self.handler.retries_received, 1)
+        self.assertEqual(self.handler.deduplicator.duplicates, 1)
+
+    def test_shared_deduplication_off_the_ack_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.handler.deduplicator = SqliteEventDeduplicator(os.path.join(directory, 'events.sqlite3'))
+            data = {'type': 'event_callback', 'event_id': 'Ev1', 'event': {'type': 'message', 'channel': 'C1'}}
+            self.handle(signed_request('secret', data, 1000))
+            self.handle(signed_request('secret', data, 1000, {'X-Slack-Retry-Num': '1'}))
+            # Acked before the database was consulted.
+            self.assertEqual(self.events, [])
+            self.loop.run_until_complete(self.handler.close())
+            self.assertEqual(self.events, ['Ev1'])
+            self.assertEqual(self.handler.deduplicator.duplicates, 1)
+
+    def test_shared_deduplication_drains_on_close(self):
+        handled = []
+
+        @self.handler.on('message')
+        async def on_message(data):
+            await asyncio.sleep(0)
+            handled.append(data['event_id'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.handler.deduplicator = SqliteEventDeduplicator(os.path.join(directory, 'events.sqlite3'))
+            for i in range(5):
+                data = {'type': 'event_callback', 'event_id': 'Ev{}'.format(i), 'event': {'type': 'message'}}
+                self.handle(signed_request('secret', data, 1000))
+            self.loop.run_until_complete(self.handler.close())
+        self.assertEqual(sorted(handled), ['Ev{}'.format(i) for i in range(5)])
+        self.assertEqual(self.handler.dispatcher.shed, 0)
@@ -0,0 +1,48 @@
+import unittest
+
+from joonbot.arguments import Text, choice, compile_parser, tokenize
+from joonbot.exceptions import ArgumentError
+from joonbot.plugins.air_pollution import air_pollution
+
+METHOD = choice('status', 'ping')
+
+
+class TestArguments(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(tokenize('echo "hello world"  \'a b\' “c d” e'), ['echo', 'hello world', 'a b', 'c d', 'e'])
+        self.assertEqual(tokenize('mc <http://mc.example.com|mc.example.com> ping'), ['mc', 'mc.example.com', 'ping'])
+        self.assertEqual(tokenize('hi <@U010K3P2ZPW> <#C1|general> <@!1234>'), ['hi', 'U010K3P2ZPW', 'C1', '1234'])
+        self.assertEqual(tokenize('link <https://example.com>'), ['link', 'https://example.com'])
+
+    def test_legacy_commands_have_no_parser(self):
+        async def legacy(*args, bot, **_):
+            pass
+        self.assertIsNone(compile_parser(legacy))
+
+    def test_parse(self):
+        async def command(_, address, count: int = 1, method: METHOD = 'status', *, bot, **__):
+            pass
+        parse = compile_parser(command)
+        self.assertEqual(parse(['mc', 'host']), ['mc', 'host', 1, 'status'])
+        self.assertEqual(parse(['mc', 'host', '3', 'ping']), ['mc', 'host', 3, 'ping'])
+        with self.assertRaisesRegex(ArgumentError, 'address'):
+            parse(['mc'])
+        with self.assertRaisesRegex(ArgumentError, '`x`'):
+            parse(['mc', 'host', 'x'])
+        with self.assertRaisesRegex(ArgumentError, 'status, ping'):
+            parse(['mc', 'host', '3', 'query'])
+        with self.assertRaises(ArgumentError):
+            parse(['mc', 'host', '3', 'ping', 'extra'])
+
+    def test_text_union(self):
+        async def command(_, target: (int, Text) = None, **__):
+            pass
+        parse = compile_parser(command)
+        self.assertEqual(parse(['covid19']), ['covid19', None])
+        self.assertEqual(parse(['covid19', '3']), ['covid19', 3])
+        self.assertEqual(parse(['covid19', 'South', 'Korea']), ['covid19', 'South Korea'])
+
+    def test_air_pollution_station(self):
+        parse = compile_parser(air_pollution)
+        self.assertEqual(parse(['미세먼지']), ['미세먼지', None])
+        self.assertEqual(parse(['미세먼지', '서울', '중구']), ['미세먼지', '서울 중구'])
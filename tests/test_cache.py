@@ -0,0 +1,110 @@
+import asyncio
+import unittest
+
+from joonbot.cache import TTLCache, cached
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = TTLCache(maxsize=2, ttl=10, error_ttl=5, clock=self.clock)
+        self.loop = asyncio.get_event_loop()
+
+    def test_expiry(self):
+        self.cache.set('a', 1)
+        self.clock.now = 9
+        self.assertEqual(self.cache.get('a'), 1)
+        self.clock.now = 10
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_lru_eviction(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+        self.assertIn('a', self.cache)
+        self.assertNotIn('b', self.cache)
+
+    def test_single_flight(self):
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0)
+            return 'value'
+
+        async def run():
+            return await asyncio.gather(*[self.cache.get_or_fetch('a', fetch) for _ in range(5)])
+
+        self.assertEqual(self.loop.run_until_complete(run()), ['value'] * 5)
+        self.assertEqual(len(calls), 1)
+
+    def test_error_caching(self):
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            raise KeyError('a')
+
+        for _ in range(2):
+            with self.assertRaises(KeyError):
+                self.loop.run_until_complete(self.cache.get_or_fetch('a', fetch))
+        self.assertEqual(len(calls), 1)
+        self.clock.now = 5
+        with self.assertRaises(KeyError):
+            self.loop.run_until_complete(self.cache.get_or_fetch('a', fetch))
+        self.assertEqual(len(calls), 2)
+
+    def test_stale_while_revalidate(self):
+        cache = TTLCache(ttl=10, error_ttl=5, stale_ttl=20, clock=self.clock)
+        results = ['fresh', KeyError('upstream'), 'refreshed']
+        calls = []
+
+        async def fetch():
+            calls.append(self.clock.now)
+            await asyncio.sleep(0)
+            result = results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        async def get():
+            value = await cache.get_or_fetch('a', fetch)
+            await asyncio.sleep(0.01)
+            return value
+
+        self.assertEqual(self.loop.run_until_complete(get()), 'fresh')
+        self.clock.now = 15
+        # Served stale without waiting; the failed refresh keeps it and backs off for error_ttl.
+        self.assertEqual(self.loop.run_until_complete(get()), 'fresh')
+        self.assertEqual(self.loop.run_until_complete(get()), 'fresh')
+        self.assertEqual(calls, [0, 15])
+        self.clock.now = 21
+        self.assertEqual(self.loop.run_until_complete(get()), 'fresh')
+        self.assertEqual(self.loop.run_until_complete(get()), 'refreshed')
+        self.assertEqual((cache.misses, cache.stale_hits, cache.errors), (1, 2, 1))
+        self.clock.now = 60
+        self.assertNotIn('a', cache)
+
+    def test_cached_decorator(self):
+        calls = []
+
+        @cached(ttl=10, clock=self.clock)
+        async def square(x):
+            calls.append(x)
+            return x * x
+
+        async def run():
+            return [await square(2), await square(2), await square(3)]
+
+        self.assertEqual(self.loop.run_until_complete(run()), [4, 4, 9])
+        self.assertEqual(calls, [2, 3])
+        self.assertEqual(square.cache.hits, 1)
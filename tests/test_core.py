@@ -1,7 +1,20 @@
 import asyncio
+import sys
 import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from joonbot.core import DiscordBot
+from joonbot.exceptions import MessageHandleAborted
+from joonbot.plugin import LazyCommand
+from joonbot.plugins import COMMANDS
 
 from .models import MockBot
+from .test_cache import FakeClock
+
+
+async def lazy_add(_, a: int, b: int = 1, *, bot, channel, **__):
+    await bot.send_message(channel=channel, text=str(a + b))
 
 
 class TestCore(unittest.TestCase):
@@ -19,3 +32,207 @@ class TestCore(unittest.TestCase):
     def test_echo(self):
         self.loop.run_until_complete(self.bot.handle_message(1, 1, 'bot echo hi'))
         self.assertEqual(self.bot.last_message(1), 'hi')
+
+    def test_trigger_order(self):
+        self.bot.triggers = ['b', 'bot ']
+        self.loop.run_until_complete(self.bot.handle_message(1, 1, 'bot echo hi'))
+        self.assertIsNone(self.bot.last_message(1))
+        self.loop.run_until_complete(self.bot.handle_message(1, 1, 'becho hi'))
+        self.assertEqual(self.bot.last_message(1), 'hi')
+
+    def test_permission(self):
+        @self.bot.command(aliases=['secret'], group=['admin'], channels=[2])
+        async def secret(*_, bot, channel, **__):
+            await bot.send_message(channel=channel, text='secret')
+
+        reasons = []
+
+        @self.bot.on_signal(MockBot.INVALID_COMMAND_SIGNAL)
+        async def invalid(reason, **_):
+            reasons.append(reason)
+
+        self.loop.run_until_complete(self.bot.handle_message(2, 'user', 'bot secret'))
+        self.loop.run_until_complete(self.bot.handle_message(1, 'admin', 'bot secret'))
+        self.loop.run_until_complete(self.bot.handle_message(2, 'admin', 'bot   secret'))
+        self.loop.run_until_complete(self.bot.handle_message(2, 'admin', 'bot nothing'))
+        self.assertEqual(self.bot.last_message(2), 'secret')
+        self.assertEqual(reasons, [MockBot.REASON_NO_PERMISSION] * 2 + [MockBot.REASON_NOT_FOUND])
+
+    def test_signal_priority(self):
+        calls = []
+
+        @self.bot.on_signal(MockBot.TRIGGERED_SIGNAL, priority=10)
+        async def expensive(**_):
+            calls.append('expensive')
+
+        @self.bot.on_signal(MockBot.TRIGGERED_SIGNAL, priority=-10)
+        async def cheap(text, **_):
+            calls.append('cheap')
+            if 'abort' in text:
+                raise MessageHandleAborted('abort')
+
+        self.loop.run_until_complete(self.bot.handle_message(1, 1, 'no trigger'))
+        self.loop.run_until_complete(self.bot.handle_message(1, 1, 'bot echo abort'))
+        self.assertEqual(calls, ['cheap'])
+        self.assertIsNone(self.bot.last_message(1))
+        self.loop.run_until_complete(self.bot.handle_message(1, 1, 'bot echo hi'))
+        self.assertEqual(calls, ['cheap', 'cheap', 'expensive'])
+        self.assertEqual(self.bot.last_message(1), 'hi')
+
+    def test_typed_arguments(self):
+        @self.bot.command(aliases=['add'])
+        async def add(_, a: int, b: int = 1, *, bot, channel, **__):
+            await bot.send_message(channel=channel, text=str(a + b))
+
+        @self.bot.command(aliases=['broken'])
+        async def broken(*_, **__):
+            raise TypeError('bug')
+
+        reasons = []
+
+        @self.bot.on_signal(MockBot.INVALID_COMMAND_SIGNAL)
+        async def invalid(reason, error=None, **_):
+            reasons.append((reason, error))
+
+        self.loop.run_until_complete(self.bot.handle_message(1, 1, 'bot add 2 "3"'))
+        self.assertEqual(self.bot.last_message(1), '5')
+        self.loop.run_until_complete(self.bot.handle_message(1, 1, 'bot add two'))
+        self.assertEqual(reasons, [(MockBot.REASON_INVALID_ARGUMENT, '`two` 값이 올바르지 않습니다.')])
+        self.loop.run_until_complete(self.bot.handle_message(1, 1, 'bot broken'))
+        self.assertEqual(len(reasons), 1)
+        self.assertEqual(self.bot.error_reporter.recent(1)[0].type, 'TypeError')
+
+    def test_lazy_command(self):
+        cmd = LazyCommand('tests.test_core:lazy_add', doc='lazy add')
+        self.bot.add_command(cmd, aliases=['add'])
+        self.assertEqual(self.bot.help_index.render('user', ['add']), '*add* : lazy add\n')
+        self.assertFalse(cmd.loaded)
+        self.loop.run_until_complete(self.bot.handle_message(1, 1, 'bot add 2 3'))
+        self.assertTrue(cmd.loaded)
+        self.assertEqual(self.bot.last_message(1), '5')
+
+        for command in COMMANDS:
+            self.assertTrue(callable(LazyCommand(command.target).load()), command.target)
+
+    def test_rate_limit(self):
+        clock = FakeClock()
+        bot = MockBot(
+            name='limited',
+            triggers=['bot '],
+            rate_limits={'user': (1, 2), 'channel': (1, 3), 'command': None, 'maxsize': 2, 'clock': clock},
+        )
+
+        @bot.command(aliases=['ping'])
+        async def ping(*_, bot, channel, **__):
+            await bot.send_message(channel=channel, text='pong')
+
+        @bot.command(aliases=['heavy'], cost=2)
+        async def heavy(*_, bot, channel, **__):
+            await bot.send_message(channel=channel, text='done')
+
+        limited = []
+
+        @bot.on_signal(MockBot.INVALID_COMMAND_SIGNAL)
+        async def invalid(reason, rate_limited=None, **_):
+            limited.append((reason, rate_limited))
+
+        def send(user, command, channel=1):
+            self.loop.run_until_complete(bot.handle_message(channel, user, 'bot ' + command))
+
+        send('a', 'ping')
+        send('a', 'ping')
+        send('a', 'ping')
+        send('a', 'ping')
+        self.assertEqual(bot.message_history[1], ['pong', 'pong'])
+        self.assertEqual([(r.scope, r.retry_after, r.first) for _, r in limited],
+                         [('user', 1, True), ('user', 1, False)])
+        self.assertEqual(limited[0][0], MockBot.REASON_RATE_LIMITED)
+
+        # Another user still has tokens, but the channel runs dry after one more.
+        send('b', 'ping')
+        send('b', 'ping')
+        self.assertEqual(len(bot.message_history[1]), 3)
+        self.assertEqual(limited[-1][1].scope, 'channel')
+
+        clock.now = 2
+        send('a', 'heavy')
+        self.assertEqual(bot.last_message(1), 'done')
+        send('a', 'ping', channel=2)
+        self.assertEqual(limited[-1][1][:2], ('user', 1))
+        self.assertTrue(limited[-1][1].first)
+
+        # Idle keys are evicted past maxsize, so memory stays bounded.
+        for user in range(10):
+            send(user, 'ping', channel=3)
+        self.assertLessEqual(len(bot.rate_limiter), 4)
+        self.assertEqual(bot.clone(bot).get_command('heavy').cost, 2)
+
+    def test_rate_limit_partition(self):
+        clock = FakeClock()
+        bot = MockBot(name='limited', triggers=['bot '],
+                      rate_limits={'user': (2, 4), 'channel': None, 'command': None, 'clock': clock})
+        bot.rate_limiter.partition(2)
+
+        @bot.command(aliases=['ping'])
+        async def ping(*_, bot, channel, **__):
+            await bot.send_message(channel=channel, text='pong')
+
+        for _ in range(4):
+            self.loop.run_until_complete(bot.handle_message(1, 'a', 'bot ping'))
+        self.assertEqual(len(bot.message_history[1]), 2)
+        clock.now = 1
+        for _ in range(4):
+            self.loop.run_until_complete(bot.handle_message(1, 'a', 'bot ping'))
+        self.assertEqual(len(bot.message_history[1]), 3)
+
+    def test_help_index(self):
+        @self.bot.command(aliases=['admin', 'a'], group=['root'])
+        async def admin(*_, **__):
+            """admin only"""
+
+        @self.bot.command(aliases=['about'])
+        async def about(*_, **__):
+            """about"""
+
+        public = '*about* : about\n*echo* : None\n'
+        self.assertEqual(self.bot.help_index.render('user'), public)
+        self.assertEqual(self.bot.help_index.render('root'), '*about* : about\n*admin/a* : admin only\n*echo* : None\n')
+        self.assertEqual(self.bot.help_index.render('user', ['a', 'echo']), '*echo* : None\n')
+        self.assertEqual(self.bot.help_index.render('root', ['echo', 'a']), '*admin/a* : admin only\n*echo* : None\n')
+
+        @self.bot.command(aliases=['zzz'])
+        async def zzz(*_, **__):
+            """sleep"""
+
+        self.assertEqual(self.bot.help_index.render('user'), public + '*zzz* : sleep\n')
+
+    def test_discord_lean_profile(self):
+        options = DiscordBot.client_options()
+        self.assertIsNone(options['max_messages'])
+        self.assertFalse(options['intents'].presences)
+        self.assertTrue(options['intents'].members)
+        self.assertFalse(options['member_cache_flags'].joined)
+        self.assertEqual(DiscordBot.client_options(lean=False), {})
+
+        with mock.patch.dict(sys.modules, {'discord': SimpleNamespace(__version__='1.4.1')}):
+            self.assertEqual(DiscordBot.client_options(), {'max_messages': None})
+            self.assertEqual(DiscordBot.client_options(lean=False), {})
+
+        bot = DiscordBot.clone(self.bot, token=None)
+        handled = []
+
+        async def handle_message(channel, user, text, **_):
+            handled.append(text)
+
+        bot.handle_message = handle_message
+        for text in ('hello', 'bot echo hi'):
+            message = SimpleNamespace(content=text, channel=1, author=1)
+            self.loop.run_until_complete(bot.on_message(message))
+        self.assertEqual(handled, ['bot echo hi'])
+
+        @bot.on_signal(DiscordBot.PRE_MESSAGE_SIGNAL)
+        async def observe(**_):
+            pass
+
+        self.loop.run_until_complete(bot.on_message(SimpleNamespace(content='hello', channel=1, author=1)))
+        self.assertEqual(handled, ['bot echo hi', 'hello'])
@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+
+from joonbot.covid19 import Covid19Dataset, Covid19Snapshot
+
+from .test_cache import FakeClock
+
+COUNTRIES_STAT = [
+    {'country_name': 'China', 'cases': '81,000', 'deaths': '3,300', 'total_recovered': '76,000'},
+    {'country_name': 'USA', 'cases': '200,000', 'deaths': '4,500', 'total_recovered': '8,000'},
+    {'country_name': 'S. Korea', 'cases': '9,887', 'deaths': '165', 'total_recovered': 'N/A'},
+]
+
+
+class TestCovid19Snapshot(unittest.TestCase):
+    def setUp(self):
+        self.snapshot = Covid19Snapshot(COUNTRIES_STAT, aliases={'한국': 'S. Korea'})
+
+    def test_sorted(self):
+        self.assertEqual([stat.country_name for stat in self.snapshot.stats], ['USA', 'China', 'S. Korea'])
+        self.assertEqual(self.snapshot.lines[0], 'USA: 200,000 / 4,500 / 8,000')
+
+    def test_find(self):
+        self.assertEqual(self.snapshot.find('  s.  KOREA ').cases, 9887)
+        self.assertEqual(self.snapshot.find('한국').country_name, 'S. Korea')
+        self.assertIsNone(self.snapshot.find('Atlantis'))
+
+    def test_page(self):
+        self.assertEqual(self.snapshot.page(5, pagination=2), (2, 2, ['S. Korea: 9,887 / 165 / N/A']))
+
+
+class TestCovid19Dataset(unittest.TestCase):
+    def test_keeps_snapshot_on_error(self):
+        responses = [{'countries_stat': COUNTRIES_STAT}, ConnectionError()]
+
+        async def fetch():
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        dataset = Covid19Dataset(fetch)
+        loop = asyncio.get_event_loop()
+        snapshot = loop.run_until_complete(dataset.get())
+        with self.assertRaises(ConnectionError):
+            loop.run_until_complete(dataset.refresh())
+        self.assertIs(loop.run_until_complete(dataset.get()), snapshot)
+
+    def test_refreshes_on_use_without_periodic_task(self):
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return {'countries_stat': COUNTRIES_STAT[:len(calls)]}
+
+        clock = FakeClock()
+        dataset = Covid19Dataset(fetch, refresh_interval=300, clock=clock)
+        loop = asyncio.get_event_loop()
+        self.assertEqual(len(loop.run_until_complete(dataset.get())), 1)
+        clock.now = 300
+        # The old snapshot answers right away while the refresh runs in the background.
+        self.assertEqual(len(loop.run_until_complete(dataset.get())), 1)
+        loop.run_until_complete(asyncio.sleep(0))
+        self.assertEqual(len(loop.run_until_complete(dataset.get())), 2)
+        self.assertEqual(len(calls), 2)
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from joonbot.events import EventDeduplicator, EventDispatcher, SqliteEventDeduplicator
+
+from .test_cache import FakeClock
+
+
+class TestEventDeduplicator(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.deduplicator = EventDeduplicator(window=60, maxsize=2, clock=self.clock)
+
+    def test_window(self):
+        self.assertFalse(self.deduplicator.is_duplicate('Ev1'))
+        self.assertTrue(self.deduplicator.is_duplicate('Ev1'))
+        self.clock.now = 60
+        self.assertFalse(self.deduplicator.is_duplicate('Ev1'))
+        self.assertEqual(self.deduplicator.duplicates, 1)
+
+    def test_maxsize(self):
+        for event_id in ('Ev1', 'Ev2', 'Ev3'):
+            self.assertFalse(self.deduplicator.is_duplicate(event_id))
+        self.assertEqual(len(self.deduplicator), 2)
+        self.assertFalse(self.deduplicator.is_duplicate('Ev1'))
+        self.assertTrue(self.deduplicator.is_duplicate('Ev3'))
+
+
+class TestEventDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+        self.handled = []
+
+    async def handler(self, data):
+        await asyncio.sleep(0)
+        self.handled.append(data)
+
+    def test_drain_on_close(self):
+        dispatcher = EventDispatcher(workers=2, high_water_mark=3, ordered=True)
+
+        async def run():
+            results = [dispatcher.submit(self.handler, i, key='C1') for i in range(4)]
+            self.assertEqual(dispatcher.depth, 3)
+            await dispatcher.close()
+            return results
+
+        self.assertEqual(self.loop.run_until_complete(run()), [True, True, True, False])
+        self.assertEqual(self.handled, [0, 1, 2])
+        self.assertEqual(dispatcher.shed, 1)
+        self.assertEqual(dispatcher.processed, 3)
+        self.assertFalse(dispatcher.started)
+
+
+class TestSqliteEventDeduplicator(unittest.TestCase):
+    def test_shared_between_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'events.sqlite3')
+            clock = FakeClock()
+            first = SqliteEventDeduplicator(path, window=60, maxsize=2, prune_every=1, clock=clock)
+            second = SqliteEventDeduplicator(path, window=60, maxsize=2, prune_every=1, clock=clock)
+            self.assertFalse(first.is_duplicate('Ev1'))
+            self.assertTrue(second.is_duplicate('Ev1'))
+            clock.now = 60
+            self.assertFalse(second.is_duplicate('Ev1'))
+            self.assertFalse(first.is_duplicate('Ev2'))
+            self.assertFalse(first.is_duplicate('Ev3'))
+            self.assertEqual(len(second), 2)
+            first.close()
+            second.close()
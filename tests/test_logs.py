@@ -0,0 +1,56 @@
+import asyncio
+import io
+import json
+import logging
+import unittest
+
+from joonbot.logs import LogPipeline, log_fields
+
+
+class TestLogPipeline(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+        self.stream = io.StringIO()
+        self.logger = logging.getLogger('tests.logs')
+        self.logger.propagate = False
+
+    def tearDown(self):
+        self.logger.propagate = True
+
+    def lines(self):
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_json_records(self):
+        pipeline = LogPipeline(level=logging.DEBUG, sample_every=3, stream=self.stream, logger=self.logger)
+        self.loop.run_until_complete(pipeline.start())
+        channel = type('Channel', (), {'id': 42})()
+        self.logger.info('hello %s', 'world', extra=log_fields('discord', channel, 'U1', 'echo'))
+        for i in range(7):
+            self.logger.debug('Handled %s', i, extra=log_fields('slack', 'C1', 'U1', 'echo', outcome='ok'))
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            self.logger.error('Command %s failed', 'echo', exc_info=True)
+        self.loop.run_until_complete(pipeline.close())
+
+        lines = self.lines()
+        self.assertEqual(lines[0]['message'], 'hello world')
+        self.assertEqual((lines[0]['platform'], lines[0]['channel'], lines[0]['user'], lines[0]['command']),
+                         ('discord', 42, 'U1', 'echo'))
+        debug = [line for line in lines if line['level'] == 'DEBUG']
+        self.assertEqual([line['message'] for line in debug], ['Handled 0', 'Handled 3', 'Handled 6'])
+        self.assertEqual(debug[0]['sample_rate'], 3)
+        self.assertEqual(pipeline.sampler.sampled_out, 4)
+        self.assertIn('ValueError: boom', lines[-1]['traceback'])
+        self.assertNotIn(pipeline.handler, self.logger.handlers)
+
+    def test_drops_when_full(self):
+        pipeline = LogPipeline(maxsize=2, stream=self.stream, logger=self.logger)
+        self.logger.addHandler(pipeline.handler)
+        self.logger.setLevel(logging.INFO)
+        try:
+            for i in range(5):
+                self.logger.info('message %s', i)
+        finally:
+            self.logger.removeHandler(pipeline.handler)
+        self.assertEqual((pipeline.depth, pipeline.dropped), (2, 3))
@@ -0,0 +1,51 @@
+import asyncio
+import unittest
+
+from joonbot import metrics
+from joonbot.metrics import Registry
+
+from .models import MockBot
+
+
+class TestRegistry(unittest.TestCase):
+    def test_render(self):
+        registry = Registry()
+        registry.counter('requests_total', 'Requests.', ['path']).inc('/a "b"')
+        histogram = registry.histogram('latency_seconds', 'Latency.', buckets=(0.1, 1))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        registry.register_collector(lambda: [('depth', 'gauge', 'Depth.', [({'queue': 'q'}, 3)])])
+        self.assertEqual(registry.render(), '\n'.join([
+            '# HELP requests_total Requests.',
+            '# TYPE requests_total counter',
+            'requests_total{path="/a \\"b\\""} 1',
+            '# HELP latency_seconds Latency.',
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{le="0.1"} 1',
+            'latency_seconds_bucket{le="1"} 2',
+            'latency_seconds_bucket{le="+Inf"} 2',
+            'latency_seconds_sum 0.55',
+            'latency_seconds_count 2',
+            '# HELP depth Depth.',
+            '# TYPE depth gauge',
+            'depth{queue="q"} 3',
+        ]) + '\n')
+
+
+class TestCommandMetrics(unittest.TestCase):
+    def test_outcomes(self):
+        bot = MockBot(name='metered', triggers=['m '])
+        bot.PLATFORM = 'Mock'
+
+        @bot.command(aliases=['fail', 'f'])
+        async def fail(*_, **__):
+            raise RuntimeError()
+
+        loop = asyncio.get_event_loop()
+        for text in ('m fail', 'm f', 'm nothing', 'chatter'):
+            loop.run_until_complete(bot.handle_message(1, 1, text))
+        self.assertEqual(metrics.COMMANDS.value('Mock', 'fail', 'error'), 2)
+        self.assertEqual(metrics.COMMANDS.value('Mock', '', 'not_found'), 1)
+        self.assertEqual(metrics.COMMAND_DURATION.count('Mock', 'fail'), 2)
+        self.assertEqual(metrics.MESSAGE_DURATION.count('Mock'), 3)
+        self.assertEqual(metrics.COMMANDS_IN_FLIGHT.value('Mock', 'fail'), 0)
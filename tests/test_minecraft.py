@@ -0,0 +1,53 @@
+import asyncio
+import socket
+import unittest
+
+from joonbot.minecraft import MinecraftStatusClient
+
+
+class TestMinecraftStatusClient(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(8)
+        self.address = '127.0.0.1:{}'.format(self.server.getsockname()[1])
+
+    def tearDown(self):
+        self.server.close()
+
+    @staticmethod
+    def hanging_query(address, method):
+        host, port = address.split(':')
+        with socket.create_connection((host, int(port))) as connection:
+            connection.settimeout(1)
+            connection.recv(1)
+
+    def test_event_loop_stays_responsive(self):
+        client = MinecraftStatusClient(timeout=0.2, per_host_limit=1, query=self.hanging_query)
+        ticks = []
+
+        async def ticker():
+            for _ in range(20):
+                ticks.append(self.loop.time())
+                await asyncio.sleep(0.01)
+
+        async def run():
+            results = await asyncio.gather(
+                client.fetch(self.address, 'status'),
+                client.fetch(self.address, 'ping'),
+                ticker(),
+                return_exceptions=True,
+            )
+            await client.close()
+            return results
+
+        status, ping, _ = self.loop.run_until_complete(run())
+        self.assertIsInstance(status, asyncio.TimeoutError)
+        self.assertIsInstance(ping, asyncio.TimeoutError)
+        self.assertEqual(len(ticks), 20)
+        self.assertLess(max(b - a for a, b in zip(ticks, ticks[1:])), 0.1)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            self.loop.run_until_complete(client.fetch(self.address, 'status'))
+        self.assertEqual(client.cache.errors, 2)
@@ -0,0 +1,62 @@
+import asyncio
+import unittest
+
+from joonbot.outbound import SendScheduler
+
+
+class RateLimited(Exception):
+    pass
+
+
+class TestSendScheduler(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+        self.posts = []
+        self.failures = 0
+
+    async def post(self, channel, text, **_):
+        if self.failures:
+            self.failures -= 1
+            raise RateLimited()
+        await asyncio.sleep(0)
+        self.posts.append((channel, text))
+        return len(self.posts)
+
+    def test_coalesce(self):
+        scheduler = SendScheduler(self.post, channel_rate=None, global_rate=None, coalesce=True)
+
+        async def run():
+            return await asyncio.gather(*[scheduler.send('C1', str(i)) for i in range(4)])
+
+        self.assertEqual(self.loop.run_until_complete(run()), [1] * 4)
+        self.assertEqual(self.posts, [('C1', '0\n1\n2\n3')])
+        self.assertEqual(scheduler.sent, 4)
+        self.assertEqual(scheduler.depth, 0)
+
+    def test_retry_after(self):
+        scheduler = SendScheduler(
+            self.post,
+            retry_after=lambda e: 0.01 if isinstance(e, RateLimited) else None,
+        )
+        self.failures = 2
+        self.loop.run_until_complete(scheduler.send('C1', 'hi'))
+        self.assertEqual(self.posts, [('C1', 'hi')])
+        self.assertEqual(scheduler.rate_limited, 2)
+
+    def test_channel_rate(self):
+        scheduler = SendScheduler(self.post, channel_rate=100, channel_burst=1, global_rate=None)
+
+        async def run():
+            start = self.loop.time()
+            await asyncio.gather(*[scheduler.send('C1', str(i)) for i in range(3)])
+            return self.loop.time() - start
+
+        self.assertGreaterEqual(self.loop.run_until_complete(run()), 0.015)
+        self.assertEqual(len(self.posts), 3)
+
+    def test_channel_buckets_bounded(self):
+        scheduler = SendScheduler(self.post, global_rate=None, channel_buckets=2)
+        for i in range(5):
+            self.loop.run_until_complete(scheduler.send('C{}'.format(i), 'hi'))
+        self.assertEqual(len(self.posts), 5)
+        self.assertEqual(len(scheduler._channel_buckets), 2)
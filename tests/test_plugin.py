@@ -0,0 +1,125 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+from joonbot.plugin import PluginWatcher, load_plugins, reload_plugins
+
+from .models import MockBot
+
+MANIFEST = '''
+from joonbot.core import ChatBot
+from joonbot.plugin import PluginCommand, PluginSignalHandler
+
+COMMANDS = [PluginCommand('.commands:version', ['version'], 'version')]
+SIGNAL_HANDLERS = [PluginSignalHandler(ChatBot.POST_COMMAND_SIGNAL, '.commands:after')]
+'''
+
+COMMANDS = '''
+import asyncio
+
+VERSION = {version!r}
+gate = asyncio.Event() if {gated!r} else None
+seen = []
+
+
+async def version(*_, bot, channel, **__):
+    if gate is not None:
+        await gate.wait()
+    await bot.send_message(channel=channel, text=VERSION)
+
+
+async def after(**_):
+    seen.append(VERSION)
+'''
+
+
+class TestPluginReload(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.directory = tempfile.TemporaryDirectory()
+        self.package = 'hot_reload_fixture'
+        os.mkdir(os.path.join(self.directory.name, self.package))
+        self.write('__init__.py', MANIFEST)
+        self.write_commands('v1', gated=True)
+        sys.path.insert(0, self.directory.name)
+        self.bot = MockBot(name='bot', triggers=['bot '])
+        load_plugins(self.bot, package=self.package)
+
+    def tearDown(self):
+        sys.path.remove(self.directory.name)
+        for name in list(sys.modules):
+            if name.startswith(self.package):
+                del sys.modules[name]
+        self.loop.close()
+        self.directory.cleanup()
+
+    def write(self, name, source):
+        path = os.path.join(self.directory.name, self.package, name)
+        stat = os.stat(path) if os.path.exists(path) else None
+        with open(path, 'w') as f:
+            f.write(source)
+        if stat is not None:
+            # Make sure the cached bytecode is considered stale even within the same second.
+            os.utime(path, (stat.st_atime, stat.st_mtime + 1))
+
+    def write_commands(self, version, gated=False):
+        self.write('commands.py', COMMANDS.format(version=version, gated=gated))
+
+    def test_in_flight_command_finishes_on_old_version(self):
+        shared = self.bot.share()
+        old = self.loop.create_task(self.bot.handle_message(1, 1, 'bot version'))
+        self.loop.run_until_complete(asyncio.sleep(0))
+        old_module = sys.modules[self.package + '.commands']
+        self.assertFalse(old_module.gate.is_set())
+
+        self.write_commands('v2')
+        reload_plugins(self.bot, package=self.package)
+        self.loop.run_until_complete(shared.handle_message(2, 1, 'bot version'))
+        self.assertEqual(self.bot.last_message(2), 'v2')
+        self.assertIsNot(sys.modules[self.package + '.commands'], old_module)
+
+        old_module.gate.set()
+        self.loop.run_until_complete(old)
+        self.assertEqual(self.bot.last_message(1), 'v1')
+
+    def test_failed_reload_keeps_registry(self):
+        self.write_commands('v1')
+        reload_plugins(self.bot, package=self.package)
+        router = self.bot.router
+        self.write('commands.py', 'def broken(:\n')
+        with self.assertRaises(SyntaxError):
+            reload_plugins(self.bot, package=self.package)
+        self.assertIs(self.bot.router, router)
+        self.assertEqual(sys.modules[self.package + '.commands'].VERSION, 'v1')
+        self.loop.run_until_complete(self.bot.handle_message(1, 1, 'bot version'))
+        self.assertEqual(self.bot.last_message(1), 'v1')
+
+    def test_watcher(self):
+        watcher = PluginWatcher(self.bot, package=self.package)
+        self.loop.run_until_complete(watcher.start())
+        self.assertFalse(watcher.check())
+        self.write_commands('v3')
+        self.assertTrue(watcher.check())
+        self.loop.run_until_complete(watcher.close())
+        self.loop.run_until_complete(self.bot.handle_message(1, 1, 'bot version'))
+        self.assertEqual(self.bot.last_message(1), 'v3')
+        self.assertEqual(sys.modules[self.package + '.commands'].seen, ['v3'])
+
+    def test_broadcast(self):
+        trigger = os.path.join(self.directory.name, 'reload')
+        other_bot = MockBot(name='bot', triggers=['bot '])
+        load_plugins(other_bot, package=self.package)
+        sender = PluginWatcher(self.bot, package=self.package, trigger=trigger, watch_package=False)
+        receiver = PluginWatcher(other_bot, package=self.package, trigger=trigger, watch_package=False)
+        self.loop.run_until_complete(sender.start())
+        self.loop.run_until_complete(receiver.start())
+        self.assertFalse(receiver.check())
+        self.assertTrue(sender.broadcast())
+        self.assertFalse(sender.check())
+        self.assertTrue(receiver.check())
+        self.assertFalse(receiver.check())
+        self.loop.run_until_complete(sender.close())
+        self.loop.run_until_complete(receiver.close())
+        self.assertFalse(PluginWatcher(self.bot, package=self.package).broadcast())
@@ -0,0 +1,73 @@
+import asyncio
+import sys
+import unittest
+
+from joonbot.reporting import ErrorReporter
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+class TestErrorReporter(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+        self.posts = []
+
+    async def post(self, text):
+        self.posts.append(text)
+
+    def record(self, reporter, message):
+        try:
+            fail(message)
+        except ValueError:
+            return reporter.record(sys.exc_info(), user='U1')
+
+    def test_aggregate(self):
+        reporter = ErrorReporter(self.post, window=0.05)
+
+        async def run():
+            for i in range(3):
+                await reporter.report(self.record(reporter, 'boom {}'.format(i)))
+            await asyncio.sleep(0.1)
+
+        self.loop.run_until_complete(run())
+        self.assertEqual(len(self.posts), 2)
+        self.assertIn('ValueError: boom 0', self.posts[0])
+        self.assertIn('2번 더 발생했습니다', self.posts[1])
+        self.assertEqual(reporter.aggregated, 2)
+        records = reporter.recent(limit=2)
+        self.assertEqual([record.message for record in records], ['boom 2', 'boom 1'])
+        self.assertEqual(len({record.fingerprint for record in reporter.history}), 1)
+        self.assertEqual(records[0].context, {'user': 'U1'})
+
+    def test_rate_limit(self):
+        reporter = ErrorReporter(self.post, window=10, max_posts_per_minute=1)
+
+        async def run():
+            await reporter.report(self.record(reporter, 'first'))
+            try:
+                {}['missing']
+            except KeyError:
+                await reporter.report(reporter.record(sys.exc_info()))
+            await reporter.close()
+
+        self.loop.run_until_complete(run())
+        self.assertEqual(len(self.posts), 1)
+        self.assertEqual(reporter.suppressed, 1)
+
+    def test_partition(self):
+        reporter = ErrorReporter(self.post, window=10, max_posts_per_minute=10)
+        reporter.partition(4)
+
+        async def run():
+            for error in (ValueError, KeyError, TypeError, IndexError):
+                try:
+                    raise error('boom')
+                except error:
+                    await reporter.report(reporter.record(sys.exc_info()))
+            await reporter.close()
+
+        self.loop.run_until_complete(run())
+        self.assertEqual(len(self.posts), 2)
+        self.assertEqual(reporter.suppressed, 2)
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from joonbot.scheduler import SubscriptionScheduler, SubscriptionStore, next_run, parse_time_of_day
+
+from .test_cache import FakeClock
+
+# 2020-04-01 07:59:00 KST
+MORNING = 1585695540
+
+
+class TestSubscriptionScheduler(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'subscriptions.sqlite3')
+        self.clock = FakeClock()
+        self.clock.now = MORNING
+        self.fetched = []
+        self.delivered = []
+
+        async def fetch(topic):
+            self.fetched.append(topic)
+            if topic == 'broken':
+                raise ConnectionError()
+            return 'report for {}'.format(topic)
+
+        async def deliver(subscription, text):
+            self.delivered.append((subscription.channel, text))
+
+        self.scheduler = SubscriptionScheduler(SubscriptionStore(self.path), fetch, deliver, clock=self.clock)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.scheduler.close())
+        self.loop.close()
+        self.directory.cleanup()
+
+    def wait(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def tick(self):
+        async def tick():
+            due = self.scheduler.tick(self.clock())
+            if self.scheduler._publishing:
+                await asyncio.wait(self.scheduler._publishing)
+            return due
+        return self.loop.run_until_complete(tick())
+
+    def test_time_helpers(self):
+        self.assertEqual(parse_time_of_day('8'), '08:00')
+        self.assertEqual(parse_time_of_day('07:30'), '07:30')
+        self.assertIsNone(parse_time_of_day('25:00'))
+        self.assertIsNone(parse_time_of_day('종로구'))
+        self.assertEqual(next_run('08:00', MORNING), MORNING + 60)
+        self.assertEqual(next_run('07:00', MORNING), MORNING + 23 * 3600 + 60)
+
+    def test_groups_by_topic(self):
+        for channel in ('C1', 'C2', 'C3'):
+            self.wait(self.scheduler.subscribe('T1', channel, '종로구', '08:00'))
+        self.wait(self.scheduler.subscribe('T1', 'C1', '중구', '08:00'))
+        self.wait(self.scheduler.subscribe('T1', 'C1', '강남구', '09:00'))
+        self.assertIsNone(self.wait(self.scheduler.subscribe('T1', 'C1', '중구', '08:00')))
+
+        self.assertEqual(self.tick(), {})
+        self.clock.now += 60
+        self.assertEqual({topic: len(subscriptions) for topic, subscriptions in self.tick().items()},
+                         {'종로구': 3, '중구': 1})
+        self.assertEqual(sorted(self.fetched), ['종로구', '중구'])
+        self.assertEqual(len(self.delivered), 4)
+        self.assertEqual(self.tick(), {})
+
+        self.clock.now += 24 * 3600
+        self.assertEqual(set(self.tick()), {'종로구', '중구', '강남구'})
+
+    def test_unsubscribe_and_sync(self):
+        self.wait(self.scheduler.subscribe('T1', 'C1', '종로구', '08:00'))
+        self.wait(self.scheduler.subscribe('T1', 'C2', '종로구', '08:00'))
+        self.assertEqual(self.wait(self.scheduler.unsubscribe('T1', 'C1', '종로구')), 1)
+
+        other = SubscriptionStore(self.path)
+        other.add('T1', 'C3', '종로구', '08:00')
+        other.remove('T1', 'C2', '종로구')
+        other.close()
+        self.wait(self.scheduler.sync())
+
+        self.clock.now += 60
+        self.tick()
+        self.assertEqual(self.delivered, [('C3', 'report for 종로구')])
+        self.assertEqual([s.channel for s in self.wait(self.scheduler.subscriptions('T1', 'C3'))], ['C3'])
+
+    def test_fetch_failure(self):
+        self.wait(self.scheduler.subscribe('T1', 'C1', 'broken', '08:00'))
+        self.clock.now += 60
+        self.tick()
+        self.assertEqual(self.scheduler.failed, 1)
+        self.assertEqual(self.delivered, [])
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import unittest
+
+from aiohttp import web
+
+from joonbot.socketmode import SocketModeReceiver
+
+
+class StubEventHandler:
+    def __init__(self):
+        self.events = []
+
+    def dispatch_event(self, data, retry=False):
+        self.events.append((data['event_id'], retry))
+        return 'ok'
+
+
+class SocketModeStandIn:
+    def __init__(self, always_disconnect=False):
+        self.always_disconnect = always_disconnect
+        self.connections = 0
+        self.acks = []
+        self.url = None
+        self._runner = None
+
+    async def open_connection(self, request):
+        assert request.headers['Authorization'] == 'Bearer xapp-test'
+        return web.json_response({'ok': True, 'url': self.url + '/ws'})
+
+    async def websocket(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        await ws.send_str(json.dumps({'type': 'hello'}))
+        if self.connections == 1 or self.always_disconnect:
+            await ws.send_str(json.dumps({'type': 'disconnect', 'reason': 'refresh_requested'}))
+        else:
+            for i, retry_attempt in enumerate((0, 1)):
+                await ws.send_str(json.dumps({
+                    'envelope_id': 'envelope{}'.format(i),
+                    'type': 'events_api',
+                    'retry_attempt': retry_attempt,
+                    'payload': {'type': 'event_callback', 'event_id': 'Ev{}'.format(i)},
+                }))
+                self.acks.append(json.loads((await ws.receive()).data)['envelope_id'])
+        await ws.receive()
+        return ws
+
+    async def start(self):
+        stand_in = web.Application()
+        stand_in.add_routes([
+            web.post('/apps.connections.open', self.open_connection),
+            web.get('/ws', self.websocket),
+        ])
+        self._runner = web.AppRunner(stand_in)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        self.url = 'http://127.0.0.1:{}'.format(site._server.sockets[0].getsockname()[1])
+
+    async def close(self):
+        await self._runner.cleanup()
+
+
+class TestSocketModeReceiver(unittest.TestCase):
+    def test_ack_dispatch_and_reconnect(self):
+        stand_in = SocketModeStandIn()
+        event_handler = StubEventHandler()
+
+        async def run():
+            await stand_in.start()
+            receiver = SocketModeReceiver(
+                event_handler, 'xapp-test', connections=1, open_url=stand_in.url + '/apps.connections.open',
+                backoff_base=0.01, reconnect_delay=0.01,
+            )
+            await receiver.start()
+            for _ in range(100):
+                if len(event_handler.events) == 2:
+                    break
+                await asyncio.sleep(0.02)
+            await receiver.close()
+            await stand_in.close()
+            return receiver
+
+        receiver = asyncio.get_event_loop().run_until_complete(run())
+        self.assertEqual(stand_in.connections, 2)
+        self.assertEqual(stand_in.acks, ['envelope0', 'envelope1'])
+        self.assertEqual(event_handler.events, [('Ev0', False), ('Ev1', True)])
+        self.assertEqual(receiver.reconnects, 1)
+
+    def test_backs_off_when_closed_right_away(self):
+        stand_in = SocketModeStandIn(always_disconnect=True)
+
+        async def run():
+            await stand_in.start()
+            receiver = SocketModeReceiver(
+                StubEventHandler(), 'xapp-test', connections=1, open_url=stand_in.url + '/apps.connections.open',
+                backoff_base=0.05, reconnect_delay=0.01,
+            )
+            await receiver.start()
+            await asyncio.sleep(0.5)
+            await receiver.close()
+            await stand_in.close()
+
+        asyncio.get_event_loop().run_until_complete(run())
+        # 0.05s doubling with jitter allows at most a handful of attempts in half a second.
+        self.assertGreaterEqual(stand_in.connections, 2)
+        self.assertLessEqual(stand_in.connections, 6)
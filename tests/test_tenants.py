@@ -0,0 +1,74 @@
+import asyncio
+import os
+import unittest
+
+from joonbot.core import SlackBot
+from joonbot.tenants import SlackTenants, StaticTokenStore
+
+
+class RecordingSlackBot(SlackBot):
+    async def post_message(self, channel, text, **_):
+        self.posted.append((self.client.token, channel, text))
+
+    async def is_bot(self, user, event=None, **_):
+        return False
+
+
+class TestSlackTenants(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.bot = RecordingSlackBot(token='xoxb-home', name='bot', triggers=['bot '])
+        self.bot.posted = []
+
+        @self.bot.command(aliases=['echo'])
+        async def echo(*args, bot, channel, **_):
+            await bot.send_message(channel=channel, text=' '.join(args[1:]))
+
+        self.tenants = SlackTenants(self.bot, StaticTokenStore({'T1': 'xoxb-one', 'T2': 'xoxb-two'}))
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.tenants.close())
+        self.loop.close()
+
+    @staticmethod
+    def payload(team_id, text):
+        return {'team_id': team_id, 'event': {'channel': 'C1', 'user': 'U1', 'text': text}}
+
+    def test_routes_by_team(self):
+        for team_id in ('T1', 'T2', 'T3'):
+            self.loop.run_until_complete(self.tenants.message_handler(self.payload(team_id, 'bot echo ' + team_id)))
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+        self.assertEqual(sorted(self.bot.posted), [('xoxb-one', 'C1', 'T1'), ('xoxb-two', 'C1', 'T2')])
+        self.assertEqual(len(self.tenants), 2)
+        self.assertEqual(self.tenants.unknown_teams, 1)
+        self.assertEqual(self.bot.client.token, 'xoxb-home')
+
+    def test_registry_is_shared_copy_on_write(self):
+        one = self.loop.run_until_complete(self.tenants.get('T1'))
+        two = self.loop.run_until_complete(self.tenants.get('T2'))
+        self.assertIs(one.router, two.router)
+        self.assertIs(one._commands, self.bot._commands)
+        self.assertIs(one.user_cache, self.bot.user_cache)
+        self.assertIsNot(one.outbound, two.outbound)
+
+        @one.command(aliases=['only'])
+        async def only(*_, **__):
+            pass
+
+        self.assertTrue(one.has_command('only'))
+        self.assertFalse(two.has_command('only'))
+        self.assertFalse(self.bot.has_command('only'))
+        self.assertIs(two._commands, self.bot._commands)
+
+    def test_single_workspace(self):
+        tenants = SlackTenants(self.bot)
+        self.assertIs(self.loop.run_until_complete(tenants.get(None)), self.bot)
+
+    def test_token_store_from_env(self):
+        os.environ['JOONBOT_TEST_TOKENS'] = 'T1:xoxb-one, T2:xoxb-two,broken'
+        try:
+            store = StaticTokenStore.from_env('JOONBOT_TEST_TOKENS')
+        finally:
+            del os.environ['JOONBOT_TEST_TOKENS']
+        self.assertEqual(self.loop.run_until_complete(store.get_token('T2')), 'xoxb-two')
+        self.assertIsNone(self.loop.run_until_complete(store.get_token('broken')))
@@ -0,0 +1,67 @@
+import logging
+import unittest
+
+from joonbot.workers import Supervisor
+
+from .test_cache import FakeClock
+
+
+class FakeProcess:
+    def __init__(self):
+        self.alive = True
+        self.exitcode = None
+
+    def is_alive(self):
+        return self.alive
+
+    def crash(self, exitcode=1):
+        self.alive = False
+        self.exitcode = exitcode
+
+
+class TestSupervisor(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.supervisor = Supervisor(1, logger=logging.getLogger('tests.workers'), min_uptime=10,
+                                     backoff_base=1, backoff_max=4, max_failures=4, clock=self.clock)
+        self.spawned = []
+
+        def spawn(index):
+            process = self.supervisor._processes[index] = FakeProcess()
+            self.supervisor._started_at[index] = self.clock()
+            self.spawned.append(self.clock())
+            return process
+
+        self.supervisor.spawn = spawn
+        spawn(0)
+
+    def crash_and_check(self):
+        self.supervisor._processes[0].crash()
+        return self.supervisor.check()
+
+    def test_backoff_then_give_up(self):
+        self.assertTrue(self.crash_and_check())
+        self.clock.now = 0.5
+        self.assertTrue(self.supervisor.check())
+        self.clock.now = 1
+        self.assertTrue(self.supervisor.check())
+        self.assertEqual(self.spawned, [0, 1])
+
+        self.assertTrue(self.crash_and_check())
+        self.clock.now = 3
+        self.supervisor.check()
+        self.assertTrue(self.crash_and_check())
+        self.clock.now = 7
+        self.supervisor.check()
+        self.assertEqual(self.spawned, [0, 1, 3, 7])
+        self.assertFalse(self.crash_and_check())
+
+    def test_long_running_worker_respawns_immediately(self):
+        self.clock.now = 5
+        self.crash_and_check()
+        self.clock.now = 6
+        self.supervisor.check()
+        self.clock.now = 30
+        self.assertTrue(self.crash_and_check())
+        self.assertEqual(self.spawned, [0, 6, 30])
+        self.assertEqual(self.supervisor._failures[0], 0)